@@ -3,7 +3,10 @@ Seedream 批处理应用主程序入口
 """
 import os
 import sys
+import queue
+import atexit
 import logging
+import logging.handlers
 import argparse
 from pathlib import Path
 
@@ -11,47 +14,68 @@ from pathlib import Path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from src.ui.main_interface import seedream_ui
-from src.utils.config import config_manager
-from src.api.client import api_client
-from src.batch import task_scheduler
 
-
-def setup_logging():
+def setup_logging() -> logging.handlers.QueueListener:
     """设置日志系统"""
+    from src.utils.config import config_manager
+    
     # 确保日志目录存在
     log_dir = config_manager.get_absolute_path("logs")
     log_dir.mkdir(exist_ok=True)
     
-    # 配置日志格式
+    # 配置日志格式（日志格式中不含线程/进程信息，跳过每条记录的相关采集）
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    formatter = logging.Formatter(log_format, datefmt='%Y-%m-%d %H:%M:%S')
     
     # 获取日志级别
     log_level = config_manager.get("logging.level", "INFO")
     
-    # 配置根日志器
+    # 实际的输出处理器由后台监听线程持有，避免在调用线程上同步写盘
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    file_handler = logging.FileHandler(
+        log_dir / "seedream_app.log",
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(formatter)
+    
+    # 文件日志先在内存中缓冲，批量写盘；ERROR及以上级别立即刷新
+    buffered_file_handler = logging.handlers.MemoryHandler(
+        capacity=config_manager.get("logging.buffer_capacity", 512),
+        flushLevel=logging.ERROR,
+        target=file_handler,
+        flushOnClose=True
+    )
+    atexit.register(buffered_file_handler.flush)
+    
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, buffered_file_handler, stream_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # 配置根日志器：日志调用只做入队操作
     logging.basicConfig(
         level=getattr(logging, log_level.upper()),
-        format=log_format,
-        handlers=[
-            # 控制台输出
-            logging.StreamHandler(sys.stdout),
-            # 文件输出
-            logging.FileHandler(
-                log_dir / "seedream_app.log",
-                encoding='utf-8'
-            )
-        ]
+        handlers=[logging.handlers.QueueHandler(log_queue)]
     )
     
     # 设置第三方库日志级别
     logging.getLogger("requests").setLevel(logging.WARNING)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("PIL").setLevel(logging.WARNING)
+    
+    return listener
 
 
 def initialize_application():
     """初始化应用程序"""
+    from src.utils.config import config_manager
+    
     logger = logging.getLogger(__name__)
     
     try:
@@ -59,6 +83,12 @@ def initialize_application():
         config_manager.create_directories()
         logger.info("目录结构检查完成")
         
+        # 开启任务日志，恢复上次未完成的队列
+        journal_path = config_manager.get("batch.queue_journal")
+        if journal_path:
+            from src.batch import task_queue
+            task_queue.open_journal(str(config_manager.get_absolute_path(journal_path)))
+        
         # 检查API密钥
         if not config_manager.validate_api_key():
             logger.warning("API密钥未配置，请在界面中设置")
@@ -77,6 +107,8 @@ def initialize_application():
 
 def create_sample_files():
     """创建示例文件"""
+    from src.utils.config import config_manager
+    
     logger = logging.getLogger(__name__)
     
     try:
@@ -185,7 +217,7 @@ def main():
     args = parser.parse_args()
     
     # 设置日志
-    setup_logging()
+    log_listener = setup_logging()
     logger = logging.getLogger(__name__)
     
     logger.info("=" * 50)
@@ -200,9 +232,14 @@ def main():
     # 创建示例文件
     create_sample_files()
     
+    # 在日志配置完成后再导入界面和调度器，避免命令行解析阶段加载重量级依赖
+    from src.batch import task_scheduler
+    
     try:
+        from src.ui.main_interface import get_seedream_ui
+        
         # 创建并启动界面
-        interface = seedream_ui.create_interface()
+        interface = get_seedream_ui().create_interface()
         
         logger.info(f"启动Web界面...")
         logger.info(f"地址: http://{args.host}:{args.port}")
@@ -233,6 +270,12 @@ def main():
             task_scheduler.stop()
         
         logger.info("应用程序已退出")
+        
+        # 停止日志监听线程并刷新缓冲区（已手动停止则无需再由atexit处理）
+        atexit.unregister(log_listener.stop)
+        log_listener.stop()
+        for handler in log_listener.handlers:
+            handler.flush()
 
 
 if __name__ == "__main__":
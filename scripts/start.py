@@ -5,6 +5,7 @@ Seedream 批处理应用一键启动脚本
 import os
 import sys
 import subprocess
+import hashlib
 import platform
 from pathlib import Path
 
@@ -12,7 +13,7 @@ from pathlib import Path
 def check_python_version():
     """检查Python版本"""
     version = sys.version_info
-    if version.major < 3 or (version.major == 3 and version.minor < 8):
+    if version < (3, 8):
         print("❌ 错误: 需要 Python 3.8 或更高版本")
         print(f"当前版本: Python {version.major}.{version.minor}.{version.micro}")
         return False
@@ -48,26 +49,39 @@ def get_venv_python():
         return Path("venv") / "bin" / "python"
 
 
+# 虚拟环境Python路径只需计算一次
+VENV_PYTHON = get_venv_python()
+
+# 记录已安装依赖对应的requirements.txt哈希
+REQUIREMENTS_FILE = Path("requirements.txt")
+REQUIREMENTS_HASH_FILE = Path("venv") / ".req.sha256"
+
+
 def install_dependencies():
     """安装依赖包"""
-    python_path = get_venv_python()
-    
-    if not python_path.exists():
+    if not VENV_PYTHON.exists():
         print("❌ 虚拟环境Python解释器未找到")
         return False
     
+    # requirements.txt未变更时跳过安装
+    req_hash = hashlib.sha256(REQUIREMENTS_FILE.read_bytes()).hexdigest()
+    if REQUIREMENTS_HASH_FILE.exists() and REQUIREMENTS_HASH_FILE.read_text().strip() == req_hash:
+        print("✅ 依赖未变更，跳过安装")
+        return True
+    
     print("📦 正在安装依赖包...")
     try:
         # 升级pip
         subprocess.run([
-            str(python_path), "-m", "pip", "install", "--upgrade", "pip"
-        ], check=True, capture_output=True)
+            str(VENV_PYTHON), "-m", "pip", "install", "--quiet", "--upgrade", "pip"
+        ], check=True)
         
-        # 安装依赖
+        # 安装依赖（只安装尚未满足的依赖，不升级已安装的包）
         subprocess.run([
-            str(python_path), "-m", "pip", "install", "-r", "requirements.txt"
+            str(VENV_PYTHON), "-m", "pip", "install", "--quiet", "-r", "requirements.txt"
         ], check=True)
         
+        REQUIREMENTS_HASH_FILE.write_text(req_hash)
         print("✅ 依赖包安装完成")
         return True
         
@@ -81,10 +95,12 @@ def create_directories():
     directories = ["input", "output", "logs", "config"]
     
     for dir_name in directories:
-        dir_path = Path(dir_name)
-        if not dir_path.exists():
-            dir_path.mkdir(parents=True, exist_ok=True)
+        # 直接创建目录，已存在时跳过，无需预先检查
+        try:
+            Path(dir_name).mkdir(parents=True)
             print(f"📁 创建目录: {dir_name}")
+        except FileExistsError:
+            pass
     
     print("✅ 目录结构检查完成")
 
@@ -144,13 +160,10 @@ def main():
     print("\n🚀 正在启动应用...")
     print("请稍等，首次启动可能需要一些时间...")
     
-    # 启动应用
-    python_path = get_venv_python()
-    
     try:
         # 启动主程序
         result = subprocess.run([
-            str(python_path), "main.py"
+            str(VENV_PYTHON), "main.py"
         ], cwd=Path.cwd())
         
         if result.returncode != 0:
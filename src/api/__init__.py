@@ -1,6 +1,13 @@
 """
 API模块初始化文件
 """
-from .client import SeedreamAPIClient, api_client
+from .client import SeedreamAPIClient, get_api_client
 
-__all__ = ['SeedreamAPIClient', 'api_client']
\ No newline at end of file
+__all__ = ['SeedreamAPIClient', 'get_api_client', 'api_client']
+
+
+def __getattr__(name):
+    """延迟创建全局 api_client 实例"""
+    if name == "api_client":
+        return get_api_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
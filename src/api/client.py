@@ -3,15 +3,20 @@ Seedream API客户端
 负责与Seedream服务进行通信，实现文生图、图生图、图像编辑、视频生成等功能
 """
 import os
+import mmap
+import mimetypes
 import base64
 import asyncio
+import functools
 import logging
-from typing import List, Dict, Any, Optional, Union
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Union
 from pathlib import Path
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI, AuthenticationError, NotFoundError
 import requests
-from PIL import Image
-import io
+from requests.adapters import HTTPAdapter, Retry
 
 from ..utils.config import config_manager
 
@@ -26,25 +31,61 @@ class SeedreamAPIClient:
         self.config = config_manager
         self.logger = logging.getLogger(__name__)
         
+        # 客户端内所有直接HTTP请求共用的会话，复用keep-alive连接和TLS会话
+        self._http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.3)
+        )
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        
+        # 异步接口专用的线程池，避免占用事件循环的默认执行器
+        self._api_executor = ThreadPoolExecutor(
+            max_workers=self.config.get("api.max_concurrency", 8),
+            thread_name_prefix="seedream-api"
+        )
+        
+        # base64编码的LRU缓存，键为 (路径, 修改时间, 文件大小)
+        self._b64_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._b64_cache_bytes = 0
+        self._b64_cache_max_bytes = self.config.get("cache.b64_max_bytes", 64 * 1024 * 1024)
+        self._b64_cache_lock = threading.Lock()
+        
         # 初始化OpenAI客户端
         self._init_client()
     
+    def close(self) -> None:
+        """释放HTTP会话和线程池等资源"""
+        self._http.close()
+        self._api_executor.shutdown(wait=False)
+    
     def _init_client(self) -> None:
         """初始化OpenAI客户端"""
+        # 缓存常用配置，避免每次请求都查询配置
+        self._model = self.config.get("api.model")
+        self._base_url = self.config.get("api.base_url")
+        # 模型信息随模型和服务地址变化，重新初始化时清除
+        self._model_info: Optional[Dict[str, Any]] = None
+        
         api_key = self.config.get_api_key()
         if not api_key:
             logger.warning("API密钥未设置，将在应用启动后设置")
             self.client = None
             return
         
-        base_url = self.config.get("api.base_url")
-        
         self.client = OpenAI(
-            base_url=base_url,
+            base_url=self._base_url,
             api_key=api_key
         )
         
-        self.logger.info(f"API客户端初始化完成，服务地址: {base_url}")
+        self.logger.info(f"API客户端初始化完成，服务地址: {self._base_url}")
+    
+    @property
+    def model(self) -> str:
+        """当前使用的模型名称"""
+        return self._model
     
     def set_api_key(self, api_key: str) -> bool:
         """
@@ -80,13 +121,58 @@ class SeedreamAPIClient:
             base64编码的图像字符串
         """
         try:
-            with open(image_path, 'rb') as image_file:
-                image_data = image_file.read()
-                return base64.b64encode(image_data).decode('utf-8')
+            # 文件修改后 mtime/size 变化，缓存自然失效
+            stat = os.stat(image_path)
+            cache_key = (os.fspath(image_path), stat.st_mtime_ns, stat.st_size)
+            with self._b64_cache_lock:
+                cached = self._b64_cache.get(cache_key)
+                if cached is not None:
+                    self._b64_cache.move_to_end(cache_key)
+                    return cached
+            
+            encoded = self._encode_file_to_base64(image_path)
+            
+            # 按编码后字符串的总长度限制缓存，超过上限的单个结果不缓存
+            if len(encoded) <= self._b64_cache_max_bytes:
+                with self._b64_cache_lock:
+                    previous = self._b64_cache.pop(cache_key, None)
+                    if previous is not None:
+                        self._b64_cache_bytes -= len(previous)
+                    self._b64_cache[cache_key] = encoded
+                    self._b64_cache_bytes += len(encoded)
+                    while self._b64_cache_bytes > self._b64_cache_max_bytes:
+                        _, evicted = self._b64_cache.popitem(last=False)
+                        self._b64_cache_bytes -= len(evicted)
+            
+            return encoded
         except Exception as e:
             self.logger.error(f"图像编码失败: {e}")
             raise
     
+    def _image_to_data_url(self, image_path: Union[str, Path]) -> str:
+        """
+        将本地图像转换为接口可接受的data URL
+        
+        Args:
+            image_path: 图像文件路径
+            
+        Returns:
+            data:image/<格式>;base64,<编码> 形式的字符串
+        """
+        mime_type = mimetypes.guess_type(os.fspath(image_path))[0] or "image/png"
+        return f"data:{mime_type.lower()};base64,{self._encode_image_to_base64(image_path)}"
+    
+    @staticmethod
+    def _encode_file_to_base64(image_path: Union[str, Path]) -> str:
+        """读取文件并编码为base64字符串"""
+        with open(image_path, 'rb') as image_file:
+            # 空文件无法映射
+            if os.fstat(image_file.fileno()).st_size == 0:
+                return ""
+            # 通过内存映射直接编码，避免先整体读入一份字节副本
+            with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return base64.b64encode(mapped).decode('ascii')
+    
     def _validate_image_urls(self, image_urls: List[str]) -> List[str]:
         """
         验证图像URL的可用性
@@ -97,10 +183,20 @@ class SeedreamAPIClient:
         Returns:
             验证后的URL列表
         """
+        if not image_urls:
+            return []
+        
+        # 并发发送HEAD请求，结果按输入顺序过滤
+        with ThreadPoolExecutor(max_workers=min(16, len(image_urls))) as executor:
+            futures = [
+                executor.submit(self._http.head, url, timeout=10, allow_redirects=True)
+                for url in image_urls
+            ]
+        
         valid_urls = []
-        for url in image_urls:
+        for url, future in zip(image_urls, futures):
             try:
-                response = requests.head(url, timeout=10)
+                response = future.result()
                 if response.status_code == 200:
                     valid_urls.append(url)
                 else:
@@ -110,6 +206,23 @@ class SeedreamAPIClient:
         
         return valid_urls
     
+    @staticmethod
+    def _build_image_list(data: list, size: str) -> List[Dict[str, Any]]:
+        """
+        从API响应数据构建图像信息列表
+        
+        Args:
+            data: API响应中的图像数据
+            size: 请求的图像尺寸（响应中无尺寸信息时使用）
+            
+        Returns:
+            图像信息列表
+        """
+        # 同一响应中的图像结构一致，只需探测一次是否带有尺寸字段
+        if data and hasattr(data[0], "size"):
+            return [{"url": image.url, "size": image.size} for image in data]
+        return [{"url": image.url, "size": size} for image in data]
+    
     def text_to_image(
         self,
         prompt: str,
@@ -140,24 +253,18 @@ class SeedreamAPIClient:
             }
             
         try:
+            # 如果需要生成多张图片则开启组图生成
+            sequential = num_images > 1
             extra_body = {
                 "watermark": watermark,
-                **kwargs
+                **kwargs,
+                "sequential_image_generation": "auto" if sequential else "disabled"
             }
-            
-            # 如果需要生成多张图片
-            if num_images > 1:
-                extra_body.update({
-                    "sequential_image_generation": "auto",
-                    "sequential_image_generation_options": {
-                        "max_images": num_images
-                    }
-                })
-            else:
-                extra_body["sequential_image_generation"] = "disabled"
+            if sequential:
+                extra_body["sequential_image_generation_options"] = {"max_images": num_images}
             
             response = self.client.images.generate(
-                model=self.config.get("api.model"),
+                model=self._model,
                 prompt=prompt,
                 size=size,
                 response_format="url",
@@ -167,17 +274,11 @@ class SeedreamAPIClient:
             # 构建返回结果
             result = {
                 "success": True,
-                "images": [],
+                "images": self._build_image_list(response.data, size),
                 "prompt": prompt,
-                "model": self.config.get("api.model")
+                "model": self._model
             }
             
-            for image in response.data:
-                result["images"].append({
-                    "url": image.url,
-                    "size": getattr(image, 'size', size)
-                })
-            
             self.logger.info(f"文生图成功，生成 {len(result['images'])} 张图片")
             return result
             
@@ -186,6 +287,7 @@ class SeedreamAPIClient:
             return {
                 "success": False,
                 "error": str(e),
+                "status_code": getattr(e, "status_code", None),
                 "prompt": prompt
             }
     
@@ -230,40 +332,32 @@ class SeedreamAPIClient:
             
             # 处理本地文件
             if image_paths:
-                for path in image_paths:
-                    if Path(path).exists():
-                        # 对于本地文件，我们将其上传或转换为URL
-                        # 这里假设我们有一个方法将本地文件转换为可访问的URL
-                        # 实际实现时可能需要上传到临时存储服务
-                        images.append(str(path))  # 临时处理，实际需要转换为URL
+                # 本地文件以base64 data URL形式随请求发送；缺失的文件在编码时报错
+                images.extend(self._image_to_data_url(path) for path in image_paths)
             
             # 处理URL
             if image_urls:
-                valid_urls = self._validate_image_urls(image_urls)
-                images.extend(valid_urls)
+                # 默认直接交由服务端校验URL，省去每个URL一次HEAD请求
+                if self.config.get("api.prevalidate_urls", False):
+                    image_urls = self._validate_image_urls(image_urls)
+                images.extend(image_urls)
             
             if not images:
                 raise ValueError("必须提供至少一张图像")
             
+            # 根据模式设置参数
+            sequential = mode == "generate" and num_images > 1
             extra_body = {
                 "image": images,
                 "watermark": watermark,
-                **kwargs
+                **kwargs,
+                "sequential_image_generation": "auto" if sequential else "disabled"
             }
-            
-            # 根据模式设置参数
-            if mode == "generate" and num_images > 1:
-                extra_body.update({
-                    "sequential_image_generation": "auto",
-                    "sequential_image_generation_options": {
-                        "max_images": num_images
-                    }
-                })
-            else:
-                extra_body["sequential_image_generation"] = "disabled"
+            if sequential:
+                extra_body["sequential_image_generation_options"] = {"max_images": num_images}
             
             response = self.client.images.generate(
-                model=self.config.get("api.model"),
+                model=self._model,
                 prompt=prompt,
                 size=size,
                 response_format="url",
@@ -273,30 +367,32 @@ class SeedreamAPIClient:
             # 构建返回结果
             result = {
                 "success": True,
-                "images": [],
+                "images": self._build_image_list(response.data, size),
                 "prompt": prompt,
                 "input_images": images,
                 "mode": mode,
-                "model": self.config.get("api.model")
+                "model": self._model
             }
             
-            for image in response.data:
-                result["images"].append({
-                    "url": image.url,
-                    "size": getattr(image, 'size', size)
-                })
-            
             self.logger.info(f"图生图成功，输入 {len(images)} 张图片，生成 {len(result['images'])} 张图片")
             return result
             
         except Exception as e:
             self.logger.error(f"图生图失败: {e}")
-            return {
+            error_result = {
                 "success": False,
                 "error": str(e),
+                "status_code": getattr(e, "status_code", None),
                 "prompt": prompt,
                 "input_images": images if 'images' in locals() else []
             }
+            
+            # 服务端拒绝URL时附带候选URL，便于定位无效图像
+            if image_urls and "url" in str(e).lower():
+                error_result["image_urls"] = list(image_urls)
+                self.logger.warning(f"图像URL可能无效: {image_urls}")
+            
+            return error_result
     
     def video_generation(
         self,
@@ -328,14 +424,26 @@ class SeedreamAPIClient:
     
     async def async_text_to_image(self, *args, **kwargs) -> Dict[str, Any]:
         """异步文生图"""
-        return await asyncio.get_event_loop().run_in_executor(
-            None, self.text_to_image, *args, **kwargs
+        return await asyncio.get_running_loop().run_in_executor(
+            self._api_executor, functools.partial(self.text_to_image, *args, **kwargs)
         )
     
     async def async_image_to_image(self, *args, **kwargs) -> Dict[str, Any]:
         """异步图生图"""
-        return await asyncio.get_event_loop().run_in_executor(
-            None, self.image_to_image, *args, **kwargs
+        return await asyncio.get_running_loop().run_in_executor(
+            self._api_executor, functools.partial(self.image_to_image, *args, **kwargs)
+        )
+    
+    async def async_video_generation(self, *args, **kwargs) -> Dict[str, Any]:
+        """异步视频生成"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._api_executor, functools.partial(self.video_generation, *args, **kwargs)
+        )
+    
+    async def async_test_connection(self) -> bool:
+        """异步测试API连接"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._api_executor, self.test_connection
         )
     
     def test_connection(self) -> bool:
@@ -345,13 +453,21 @@ class SeedreamAPIClient:
         Returns:
             连接是否成功
         """
+        if not self.client:
+            self.logger.warning("API客户端未初始化，请先设置API密钥")
+            return False
+        
         try:
-            # 使用一个简单的文生图请求测试连接
-            result = self.text_to_image(
-                prompt="测试连接",
-                size="1K"  # 使用较小尺寸节省配额
-            )
-            return result.get("success", False)
+            # 使用模型列表接口验证连接和密钥，不消耗生成配额
+            self.client.models.list()
+            return True
+        except AuthenticationError as e:
+            self.logger.error(f"API密钥验证失败: {e}")
+            return False
+        except NotFoundError:
+            # 服务端已响应但未提供模型列表接口：服务可达，无需再次请求
+            self.logger.info("API服务可达（服务端不支持模型列表接口）")
+            return True
         except Exception as e:
             self.logger.error(f"API连接测试失败: {e}")
             return False
@@ -361,12 +477,15 @@ class SeedreamAPIClient:
         获取当前模型信息
         
         Returns:
-            模型信息
+            模型信息（缓存的共享对象，调用方不应修改）
         """
+        if self._model_info is not None:
+            return self._model_info
+        
         # 将布尔值转换为字符串，以避免Gradio 4.x中的JSON Schema兼容性问题
-        return {
-            "model": self.config.get("api.model"),
-            "base_url": self.config.get("api.base_url"),
+        self._model_info = {
+            "model": self._model,
+            "base_url": self._base_url,
             "supported_sizes": ["1K", "2K", "4K"],
             "supported_formats": ["url", "b64_json"],
             "features": {
@@ -377,7 +496,26 @@ class SeedreamAPIClient:
                 "video_generation": "false"  # 暂未支持
             }
         }
+        return self._model_info
+
+
+# 全局API客户端实例（首次使用时创建）
+_api_client_instance: Optional[SeedreamAPIClient] = None
+_api_client_lock = threading.Lock()
+
+
+def get_api_client() -> SeedreamAPIClient:
+    """获取全局API客户端实例"""
+    global _api_client_instance
+    if _api_client_instance is None:
+        with _api_client_lock:
+            if _api_client_instance is None:
+                _api_client_instance = SeedreamAPIClient()
+    return _api_client_instance
 
 
-# 全局API客户端实例
-api_client = SeedreamAPIClient()
\ No newline at end of file
+def __getattr__(name: str) -> Any:
+    """兼容旧的 api_client 模块属性访问"""
+    if name == "api_client":
+        return get_api_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -2,24 +2,43 @@
 批处理核心模块
 负责任务生成、队列管理、调度执行和进度追踪
 """
+import os
+import sys
 import asyncio
+import heapq
+import itertools
 import logging
 import uuid
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Callable, Union
+from typing import List, Dict, Any, Optional, Callable, Union, Deque, Set, Mapping, Tuple, BinaryIO, Iterable
+from collections import deque
+from types import MappingProxyType
 from enum import Enum
 from dataclasses import dataclass, field
 from pathlib import Path
-import json
+import orjson
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import time
 
-from ..api.client import api_client
-from ..utils.file_handler import file_processor, directory_scanner, prompt_parser
+from ..utils.file_handler import get_directory_scanner, get_prompt_parser
 from ..utils.config import config_manager
 
 
+# 队列文件格式标识
+QUEUE_FILE_FORMAT = "seedream-queue/ndjson"
+
+# 状态队列中允许保留的过期条目余量，超过有效条目两倍加该值时重建队列
+_STALE_SLACK = 64
+
+
+def _json_default(obj: Any) -> Any:
+    """orjson 无法原生序列化的类型转换"""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+
 class TaskType(Enum):
     """任务类型"""
     TEXT_TO_IMAGE = "text_to_image"
@@ -37,7 +56,16 @@ class TaskStatus(Enum):
     CANCELLED = "cancelled"  # 已取消
 
 
-@dataclass
+# 枚举值到成员的映射，加载任务时避免逐个构造枚举
+_TASK_TYPES = {member.value: member for member in TaskType}
+_TASK_STATUSES = {member.value: member for member in TaskStatus}
+
+
+# Python 3.10+ 使用 __slots__ 减少每个任务实例的内存占用
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(eq=False, **_DATACLASS_SLOTS)
 class BatchTask:
     """批处理任务"""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -48,7 +76,7 @@ class BatchTask:
     input_urls: List[str] = field(default_factory=list)
     output_dir: str = ""
     output_files: List[str] = field(default_factory=list)
-    parameters: Dict[str, Any] = field(default_factory=dict)
+    parameters: Mapping[str, Any] = field(default_factory=dict)
     created_at: datetime = field(default_factory=datetime.now)
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
@@ -56,6 +84,8 @@ class BatchTask:
     result: Dict[str, Any] = field(default_factory=dict)
     retry_count: int = 0
     max_retries: int = 3
+    # 优先级，数值越大越先执行
+    priority: int = 0
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -68,44 +98,49 @@ class BatchTask:
             "input_urls": self.input_urls,
             "output_dir": self.output_dir,
             "output_files": self.output_files,
-            "parameters": self.parameters,
+            "parameters": dict(self.parameters),
             "created_at": self.created_at.isoformat(),
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "error_message": self.error_message,
             "result": self.result,
             "retry_count": self.retry_count,
-            "max_retries": self.max_retries
+            "max_retries": self.max_retries,
+            "priority": self.priority
         }
     
+    def set_parameter(self, key: str, value: Any) -> None:
+        """设置生成参数（参数为批量共享的只读映射时先复制，写时复制）"""
+        if not isinstance(self.parameters, dict):
+            self.parameters = dict(self.parameters)
+        self.parameters[key] = value
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'BatchTask':
         """从字典创建任务"""
-        task = cls(
-            id=data.get("id", str(uuid.uuid4())),
-            task_type=TaskType(data.get("task_type", TaskType.TEXT_TO_IMAGE.value)),
-            status=TaskStatus(data.get("status", TaskStatus.PENDING.value)),
-            prompt=data.get("prompt", ""),
+        created_at = data.get("created_at")
+        started_at = data.get("started_at")
+        completed_at = data.get("completed_at")
+        
+        return cls(
+            id=data.get("id") or str(uuid.uuid4()),
+            task_type=_TASK_TYPES[data.get("task_type", TaskType.TEXT_TO_IMAGE.value)],
+            status=_TASK_STATUSES[data.get("status", TaskStatus.PENDING.value)],
+            prompt=sys.intern(data.get("prompt", "")),
             input_files=data.get("input_files", []),
             input_urls=data.get("input_urls", []),
-            output_dir=data.get("output_dir", ""),
+            output_dir=sys.intern(data.get("output_dir", "")),
             output_files=data.get("output_files", []),
             parameters=data.get("parameters", {}),
+            created_at=datetime.fromisoformat(created_at) if created_at else datetime.now(),
+            started_at=datetime.fromisoformat(started_at) if started_at else None,
+            completed_at=datetime.fromisoformat(completed_at) if completed_at else None,
             error_message=data.get("error_message", ""),
             result=data.get("result", {}),
             retry_count=data.get("retry_count", 0),
-            max_retries=data.get("max_retries", 3)
+            max_retries=data.get("max_retries", 3),
+            priority=data.get("priority", 0)
         )
-        
-        # 处理时间字段
-        if data.get("created_at"):
-            task.created_at = datetime.fromisoformat(data["created_at"])
-        if data.get("started_at"):
-            task.started_at = datetime.fromisoformat(data["started_at"])
-        if data.get("completed_at"):
-            task.completed_at = datetime.fromisoformat(data["completed_at"])
-        
-        return task
 
 
 class TaskGenerator:
@@ -116,9 +151,26 @@ class TaskGenerator:
         self.config = config_manager
         self.logger = logging.getLogger(__name__)
     
+    @staticmethod
+    def _mint_ids(count: int) -> List[str]:
+        """
+        批量生成任务ID（UUID4格式），一次读取全部随机字节
+        
+        Args:
+            count: 需要的ID数量
+            
+        Returns:
+            任务ID列表
+        """
+        random_bytes = os.urandom(16 * count)
+        return [
+            str(uuid.UUID(bytes=random_bytes[offset:offset + 16], version=4))
+            for offset in range(0, 16 * count, 16)
+        ]
+    
     def generate_text_to_image_tasks(
         self,
-        prompts: List[str],
+        prompts: Iterable[str],
         output_dir: str,
         parameters: Dict[str, Any] = None
     ) -> List[BatchTask]:
@@ -126,24 +178,34 @@ class TaskGenerator:
         生成文生图任务
         
         Args:
-            prompts: 提示词列表
+            prompts: 提示词列表或可迭代对象（如逐行读取的提示词文件）
             output_dir: 输出目录
             parameters: 生成参数
             
         Returns:
             任务列表
         """
-        tasks = []
-        parameters = parameters or {}
+        # 批量生成ID需要预先知道数量
+        if not isinstance(prompts, (list, tuple)):
+            prompts = list(prompts)
+        # 同一批任务共享一份只读参数，避免逐个复制
+        shared_parameters = MappingProxyType(dict(parameters or {}))
+        # 同一批任务使用相同的创建时间
+        created_at = datetime.now()
+        # 驻留输出目录，所有任务共享同一个字符串对象
+        output_dir = sys.intern(output_dir)
         
-        for i, prompt in enumerate(prompts):
-            task = BatchTask(
+        tasks = [
+            BatchTask(
+                id=task_id,
                 task_type=TaskType.TEXT_TO_IMAGE,
                 prompt=prompt,
                 output_dir=output_dir,
-                parameters=parameters.copy()
+                parameters=shared_parameters,
+                created_at=created_at
             )
-            tasks.append(task)
+            for task_id, prompt in zip(self._mint_ids(len(prompts)), prompts)
+        ]
         
         self.logger.info(f"生成 {len(tasks)} 个文生图任务")
         return tasks
@@ -168,29 +230,40 @@ class TaskGenerator:
             任务列表
         """
         tasks = []
-        parameters = parameters or {}
+        # 同一批任务共享一份只读参数，避免逐个复制
+        shared_parameters = MappingProxyType(dict(parameters or {}))
+        # 同一批任务使用相同的创建时间
+        created_at = datetime.now()
+        # 驻留输出目录，所有任务共享同一个字符串对象
+        output_dir = sys.intern(output_dir)
         
         # 如果提示词只有一个，则对所有图像使用同一个提示词
         if len(prompts) == 1:
-            prompt = prompts[0]
-            for file_path in input_files:
+            prompt = sys.intern(prompts[0])
+            task_ids = self._mint_ids(len(input_files))
+            for task_id, file_path in zip(task_ids, input_files):
                 task = BatchTask(
+                    id=task_id,
                     task_type=TaskType.IMAGE_TO_IMAGE,
                     prompt=prompt,
                     input_files=[file_path],
                     output_dir=output_dir,
-                    parameters=parameters.copy()
+                    parameters=shared_parameters,
+                    created_at=created_at
                 )
                 tasks.append(task)
         else:
             # 每个文件对应一个提示词
-            for file_path, prompt in zip(input_files, prompts):
+            task_ids = self._mint_ids(min(len(input_files), len(prompts)))
+            for task_id, file_path, prompt in zip(task_ids, input_files, prompts):
                 task = BatchTask(
+                    id=task_id,
                     task_type=TaskType.IMAGE_TO_IMAGE,
                     prompt=prompt,
                     input_files=[file_path],
                     output_dir=output_dir,
-                    parameters=parameters.copy()
+                    parameters=shared_parameters,
+                    created_at=created_at
                 )
                 tasks.append(task)
         
@@ -219,7 +292,7 @@ class TaskGenerator:
             任务列表
         """
         # 扫描目录
-        scan_result = directory_scanner.scan_directory(input_dir)
+        scan_result = get_directory_scanner().scan_directory(input_dir)
         
         if "error" in scan_result:
             self.logger.error(f"目录扫描失败: {scan_result['error']}")
@@ -265,7 +338,7 @@ class TaskGenerator:
             任务列表
         """
         # 解析提示词文件
-        prompts = prompt_parser.parse_prompt_file(prompt_file)
+        prompts = get_prompt_parser().parse_prompt_file(prompt_file)
         
         if not prompts:
             self.logger.warning(f"提示词文件中没有找到有效的提示词: {prompt_file}")
@@ -285,39 +358,197 @@ class TaskQueue:
     def __init__(self):
         """初始化任务队列"""
         self.tasks: Dict[str, BatchTask] = {}
-        self.pending_queue: List[str] = []
-        self.running_queue: List[str] = []
-        self.completed_queue: List[str] = []
-        self.failed_queue: List[str] = []
+        # 任务ID的添加顺序，支持按位置直接切片分页（只在批量清理或重新加载时重建）
+        self._order: List[str] = []
+        # 任务ID -> 添加序号，按状态取任务时只对该状态的任务排序
+        self._order_seq: Dict[str, int] = {}
+        self._order_counter = itertools.count()
+        # 状态 -> (任务ID队列, 任务ID集合)；集合用于O(1)成员判断和计数
+        # 任务状态变化时不从旧队列中物理删除，出队时跳过过期条目（延迟删除）
+        self._by_status: Dict[TaskStatus, Tuple[Deque[str], Set[str]]] = self._new_status_table()
+        # 待执行任务使用最小堆：(-优先级, 重试次数, 入队序号, 任务ID)，同样延迟删除
+        self._pending_heap: List[Tuple[int, int, int, str]] = []
+        self._pending_seq = itertools.count()
+        # 任务计数变化时递增，供进度计算判断是否需要重新计算
+        self._version = 0
         self._lock = threading.Lock()
+        # 有新的待执行任务时通知等待中的消费者
+        self._task_available = threading.Condition(self._lock)
+        # 追加式任务日志（未开启时为None）
+        self._journal: Optional[BinaryIO] = None
+        self._journal_path: Optional[Path] = None
         self.logger = logging.getLogger(__name__)
     
+    @staticmethod
+    def _new_status_table() -> Dict[TaskStatus, Tuple[Deque[str], Set[str]]]:
+        """创建空的状态分派表"""
+        return {status: (deque(), set()) for status in TaskStatus}
+    
+    def _pending_entry(self, task: BatchTask) -> Tuple[int, int, int, str]:
+        """生成待执行堆条目：优先级高的先执行，同优先级时未重试的先执行，其余按入队顺序"""
+        return (-task.priority, task.retry_count, next(self._pending_seq), task.id)
+    
+    def _build_pending_heap(self, task_ids: List[str], tasks: Dict[str, BatchTask]) -> List[Tuple[int, int, int, str]]:
+        """按给定顺序为待执行任务重建堆"""
+        heap = [
+            self._pending_entry(tasks[task_id]) for task_id in task_ids
+            if task_id in tasks and tasks[task_id].status == TaskStatus.PENDING
+        ]
+        heapq.heapify(heap)
+        return heap
+    
+    def _enqueue(self, task: BatchTask) -> None:
+        """按任务状态加入对应队列（调用方需持有锁）"""
+        queue, task_ids = self._by_status[task.status]
+        task_ids.add(task.id)
+        if task.status == TaskStatus.PENDING:
+            heapq.heappush(self._pending_heap, self._pending_entry(task))
+        else:
+            queue.append(task.id)
+    
+    @property
+    def pending_queue(self) -> Deque[str]:
+        """待执行队列（按出队顺序的快照）"""
+        with self._lock:
+            return deque(self._live_queue_ids(TaskStatus.PENDING))
+    
+    @property
+    def running_queue(self) -> Deque[str]:
+        """执行中队列（快照）"""
+        with self._lock:
+            return deque(self._live_queue_ids(TaskStatus.RUNNING))
+    
+    @property
+    def completed_queue(self) -> Deque[str]:
+        """已完成队列（快照）"""
+        with self._lock:
+            return deque(self._live_queue_ids(TaskStatus.COMPLETED))
+    
+    @property
+    def failed_queue(self) -> Deque[str]:
+        """失败队列（快照）"""
+        with self._lock:
+            return deque(self._live_queue_ids(TaskStatus.FAILED))
+    
+    def _prune_stale(self, status: TaskStatus) -> None:
+        """过期条目明显多于有效条目时重建该状态的队列（调用方需持有锁，均摊O(1)）"""
+        queue, live = self._by_status[status]
+        if status == TaskStatus.PENDING:
+            if len(self._pending_heap) > 2 * len(live) + _STALE_SLACK:
+                self._pending_heap = [entry for entry in self._pending_heap if entry[-1] in live]
+                heapq.heapify(self._pending_heap)
+        elif len(queue) > 2 * len(live) + _STALE_SLACK:
+            live_ids = self._live_queue_ids(status)
+            queue.clear()
+            queue.extend(live_ids)
+    
+    def _reset_order(self, task_ids: List[str]) -> None:
+        """重建任务添加顺序（调用方需持有锁）"""
+        self._order = task_ids
+        self._order_seq = {task_id: seq for seq, task_id in enumerate(task_ids)}
+        self._order_counter = itertools.count(len(task_ids))
+    
+    def _discard_old_status(self, task_id: str) -> None:
+        """重新添加已存在的任务时，从其原状态中移除（调用方需持有锁）"""
+        old_task = self.tasks.get(task_id)
+        if old_task is None:
+            self._order_seq[task_id] = next(self._order_counter)
+            self._order.append(task_id)
+            return
+        self._by_status[old_task.status][1].discard(task_id)
+        self._prune_stale(old_task.status)
+    
     def add_task(self, task: BatchTask) -> None:
         """添加任务"""
         with self._lock:
+            self._discard_old_status(task.id)
             self.tasks[task.id] = task
+            self._enqueue(task)
+            self._version += 1
             if task.status == TaskStatus.PENDING:
-                self.pending_queue.append(task.id)
+                self._task_available.notify()
+            self._journal_put(task)
+            self._journal_flush()
             
-        self.logger.debug(f"添加任务: {task.id}")
+        self.logger.debug("添加任务: %s", task.id)
     
     def add_tasks(self, tasks: List[BatchTask]) -> None:
         """批量添加任务"""
-        for task in tasks:
-            self.add_task(task)
+        # 整批任务只获取一次锁
+        with self._lock:
+            for task in tasks:
+                self._discard_old_status(task.id)
+                self.tasks[task.id] = task
+                self._enqueue(task)
+                self._journal_put(task)
+            
+            self._version += 1
+            if self._by_status[TaskStatus.PENDING][1]:
+                self._task_available.notify_all()
+            self._journal_flush()
         
         self.logger.info(f"批量添加 {len(tasks)} 个任务")
     
     def get_next_task(self) -> Optional[BatchTask]:
         """获取下一个待执行任务"""
         with self._lock:
-            if self.pending_queue:
-                task_id = self.pending_queue.pop(0)
-                task = self.tasks[task_id]
-                task.status = TaskStatus.RUNNING
-                task.started_at = datetime.now()
-                self.running_queue.append(task_id)
-                return task
+            return self._pop_next_task()
+    
+    def wait_for_next_task(
+        self,
+        timeout: Optional[float] = None,
+        cancelled: Optional[Callable[[], bool]] = None
+    ) -> Optional[BatchTask]:
+        """
+        阻塞等待下一个待执行任务
+        
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+            cancelled: 取消条件，返回True时停止等待（配合 wake_waiters 使用）
+            
+        Returns:
+            待执行任务，超时或取消时返回None
+        """
+        with self._task_available:
+            self._task_available.wait_for(
+                lambda: bool(self._by_status[TaskStatus.PENDING][1])
+                or (cancelled is not None and cancelled()),
+                timeout
+            )
+            if cancelled is not None and cancelled():
+                return None
+            return self._pop_next_task()
+    
+    async def get_next_task_async(
+        self,
+        timeout: Optional[float] = None,
+        cancelled: Optional[Callable[[], bool]] = None
+    ) -> Optional[BatchTask]:
+        """异步等待下一个待执行任务"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.wait_for_next_task, timeout, cancelled)
+    
+    def wake_waiters(self) -> None:
+        """唤醒所有等待任务的消费者，使其重新检查取消条件"""
+        with self._task_available:
+            self._task_available.notify_all()
+    
+    def _pop_next_task(self) -> Optional[BatchTask]:
+        """取出下一个待执行任务（调用方需持有锁）"""
+        pending_ids = self._by_status[TaskStatus.PENDING][1]
+        while self._pending_heap:
+            task_id = heapq.heappop(self._pending_heap)[-1]
+            # 跳过状态已变化或已删除的过期条目
+            if task_id not in pending_ids:
+                continue
+            
+            task = self.tasks[task_id]
+            task.status = TaskStatus.RUNNING
+            task.started_at = datetime.now()
+            self._move_task_between_queues(task_id, TaskStatus.PENDING, TaskStatus.RUNNING)
+            self._journal_put(task)
+            self._journal_flush()
+            return task
         
         return None
     
@@ -342,28 +573,30 @@ class TaskQueue:
             # 设置完成时间
             if status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]:
                 task.completed_at = datetime.now()
+            
+            self._journal_put(task)
+            self._journal_flush()
     
     def _move_task_between_queues(self, task_id: str, old_status: TaskStatus, new_status: TaskStatus) -> None:
         """在队列间移动任务"""
-        # 从旧队列移除
-        if old_status == TaskStatus.PENDING and task_id in self.pending_queue:
-            self.pending_queue.remove(task_id)
-        elif old_status == TaskStatus.RUNNING and task_id in self.running_queue:
-            self.running_queue.remove(task_id)
-        elif old_status == TaskStatus.COMPLETED and task_id in self.completed_queue:
-            self.completed_queue.remove(task_id)
-        elif old_status == TaskStatus.FAILED and task_id in self.failed_queue:
-            self.failed_queue.remove(task_id)
+        if old_status == new_status:
+            return
+        
+        # 从旧状态集合移除，旧队列中的条目在出队或遍历时跳过，过期条目过多时重建
+        self._by_status[old_status][1].discard(task_id)
+        self._prune_stale(old_status)
         
         # 添加到新队列
+        self._enqueue(self.tasks[task_id])
+        self._version += 1
+        
         if new_status == TaskStatus.PENDING:
-            self.pending_queue.append(task_id)
-        elif new_status == TaskStatus.RUNNING:
-            self.running_queue.append(task_id)
-        elif new_status == TaskStatus.COMPLETED:
-            self.completed_queue.append(task_id)
-        elif new_status == TaskStatus.FAILED:
-            self.failed_queue.append(task_id)
+            self._task_available.notify()
+    
+    @property
+    def version(self) -> int:
+        """队列计数版本号"""
+        return self._version
     
     def get_task(self, task_id: str) -> Optional[BatchTask]:
         """获取任务"""
@@ -371,47 +604,105 @@ class TaskQueue:
     
     def get_tasks_by_status(self, status: TaskStatus) -> List[BatchTask]:
         """按状态获取任务"""
-        return [
-            task for task in self.tasks.values()
-            if task.status == status
-        ]
+        # 按添加顺序返回，用状态索引集合判断成员，无需读取每个任务的状态
+        with self._lock:
+            task_ids = sorted(self._by_status[status][1], key=self._order_seq.__getitem__)
+            return [self.tasks[task_id] for task_id in task_ids]
+    
+    def get_task_columns(self, offset: int = 0, limit: Optional[int] = None) -> Dict[str, list]:
+        """
+        按列获取任务的展示字段（按添加顺序分页）
+        
+        Args:
+            offset: 起始位置
+            limit: 最多返回的任务数，None表示不限制
+            
+        Returns:
+            列名到值列表的映射，包含id、task_type、status、prompt、created_at
+        """
+        stop = None if limit is None else offset + limit
+        with self._lock:
+            # 按位置切片，取任意一页的开销只与页大小有关
+            tasks = [self.tasks[task_id] for task_id in self._order[offset:stop]]
+        return {
+            "id": [task.id for task in tasks],
+            "task_type": [task.task_type.value for task in tasks],
+            "status": [task.status.value for task in tasks],
+            "prompt": [task.prompt for task in tasks],
+            "created_at": [task.created_at for task in tasks]
+        }
     
     def get_queue_status(self) -> Dict[str, int]:
         """获取队列状态"""
         with self._lock:
             return {
-                "pending": len(self.pending_queue),
-                "running": len(self.running_queue),
-                "completed": len(self.completed_queue),
-                "failed": len(self.failed_queue),
+                "pending": len(self._by_status[TaskStatus.PENDING][1]),
+                "running": len(self._by_status[TaskStatus.RUNNING][1]),
+                "completed": len(self._by_status[TaskStatus.COMPLETED][1]),
+                "failed": len(self._by_status[TaskStatus.FAILED][1]),
                 "total": len(self.tasks)
             }
     
+    def _live_queue_ids(self, status: TaskStatus) -> List[str]:
+        """获取队列中仍处于对应状态的任务ID（去除过期和重复条目，保持顺序）"""
+        queue, live = self._by_status[status]
+        if status == TaskStatus.PENDING:
+            queue = [entry[-1] for entry in sorted(self._pending_heap)]
+        seen = set()
+        task_ids = []
+        for task_id in queue:
+            if task_id in live and task_id not in seen:
+                seen.add(task_id)
+                task_ids.append(task_id)
+        return task_ids
+    
     def clear_completed_tasks(self) -> int:
         """清理已完成的任务"""
         with self._lock:
-            completed_ids = self.completed_queue.copy()
+            completed_queue, completed_set = self._by_status[TaskStatus.COMPLETED]
+            completed_ids = list(completed_set)
             for task_id in completed_ids:
                 del self.tasks[task_id]
-            self.completed_queue.clear()
+            if completed_ids:
+                self._order = [task_id for task_id in self._order if task_id in self.tasks]
+                for task_id in completed_ids:
+                    del self._order_seq[task_id]
+            completed_set.clear()
+            completed_queue.clear()
+            self._version += 1
+            
+            if completed_ids:
+                self._journal_write({"op": "delete", "ids": completed_ids})
+                self._journal_flush()
             
         self.logger.info(f"清理 {len(completed_ids)} 个已完成任务")
         return len(completed_ids)
     
     def save_to_file(self, file_path: str) -> None:
-        """保存队列到文件"""
+        """
+        保存队列到文件
+        
+        文件为NDJSON格式：第一行为队列信息，之后每行一个任务，逐个写出而不在内存中构建完整数据
+        """
         try:
-            queue_data = {
-                "tasks": {task_id: task.to_dict() for task_id, task in self.tasks.items()},
-                "pending_queue": self.pending_queue,
-                "running_queue": self.running_queue,
-                "completed_queue": self.completed_queue,
-                "failed_queue": self.failed_queue,
-                "saved_at": datetime.now().isoformat()
-            }
+            with self._lock:
+                tasks = list(self.tasks.values())
+                header = {
+                    "format": QUEUE_FILE_FORMAT,
+                    **{
+                        f"{status.value}_queue": self._live_queue_ids(status)
+                        for status in TaskStatus
+                    },
+                    "saved_at": datetime.now().isoformat()
+                }
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(queue_data, f, indent=2, ensure_ascii=False)
+            with open(file_path, 'wb') as f:
+                f.write(orjson.dumps(header, option=orjson.OPT_APPEND_NEWLINE))
+                # BatchTask 为 dataclass，由 orjson 直接序列化（枚举、时间字段均原生支持）
+                for task in tasks:
+                    f.write(orjson.dumps(
+                        task, default=_json_default, option=orjson.OPT_APPEND_NEWLINE
+                    ))
             
             self.logger.info(f"任务队列已保存到: {file_path}")
             
@@ -419,27 +710,201 @@ class TaskQueue:
             self.logger.error(f"保存任务队列失败: {e}")
     
     def load_from_file(self, file_path: str) -> None:
-        """从文件加载队列"""
+        """从文件加载队列（兼容旧版整体JSON格式）"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                queue_data = json.load(f)
+            with open(file_path, 'rb') as f:
+                queue_data = self._parse_queue_header(f.readline())
+                
+                if queue_data is not None:
+                    # 逐行解析任务
+                    task_list = [
+                        BatchTask.from_dict(orjson.loads(line))
+                        for line in f if line.strip()
+                    ]
+                else:
+                    f.seek(0)
+                    queue_data = orjson.loads(f.read())
+                    task_list = [
+                        BatchTask.from_dict(task_data)
+                        for task_data in queue_data.get("tasks", {}).values()
+                    ]
             
             # 重建任务
-            self.tasks = {
-                task_id: BatchTask.from_dict(task_data)
-                for task_id, task_data in queue_data.get("tasks", {}).items()
-            }
+            tasks = {task.id: task for task in task_list}
             
             # 重建队列
-            self.pending_queue = queue_data.get("pending_queue", [])
-            self.running_queue = queue_data.get("running_queue", [])
-            self.completed_queue = queue_data.get("completed_queue", [])
-            self.failed_queue = queue_data.get("failed_queue", [])
+            by_status = self._new_status_table()
+            for status, (queue, _) in by_status.items():
+                if status != TaskStatus.PENDING:
+                    queue.extend(queue_data.get(f"{status.value}_queue", []))
+            for task_id, task in tasks.items():
+                by_status[task.status][1].add(task_id)
+            
+            with self._lock:
+                self.tasks = tasks
+                self._reset_order(list(tasks))
+                self._by_status = by_status
+                self._pending_heap = self._build_pending_heap(
+                    queue_data.get(f"{TaskStatus.PENDING.value}_queue", []), tasks
+                )
+                self._version += 1
+                self._task_available.notify_all()
+                
+                # 日志中的旧记录已失效，以加载后的状态重写
+                if self._journal is not None:
+                    self._compact_journal_locked()
             
             self.logger.info(f"任务队列已从文件加载: {file_path}")
             
         except Exception as e:
             self.logger.error(f"加载任务队列失败: {e}")
+    
+    @staticmethod
+    def _parse_queue_header(line: bytes) -> Optional[Dict[str, Any]]:
+        """解析NDJSON队列文件的首行，不是该格式时返回None"""
+        try:
+            header = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            return None
+        
+        if isinstance(header, dict) and header.get("format") == QUEUE_FILE_FORMAT:
+            return header
+        return None
+
+    
+    def open_journal(self, file_path: str) -> None:
+        """
+        开启追加式任务日志
+        
+        先回放日志中已有的记录恢复队列，之后每次任务变化只追加一条记录，无需重写整个队列
+        
+        Args:
+            file_path: 日志文件路径
+        """
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        replayed = path.exists()
+        if replayed:
+            self._replay_journal(path)
+        
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+            self._journal_path = path
+            self._journal = open(path, 'ab')
+            
+            # 回放后以当前状态重写日志，避免日志随每次启动无限增长
+            if replayed:
+                self._compact_journal_locked()
+        
+        self.logger.info(f"任务日志已开启: {file_path}")
+    
+    def close_journal(self) -> None:
+        """关闭任务日志"""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+                self._journal_path = None
+    
+    def compact_journal(self) -> None:
+        """压缩任务日志：用当前队列状态重写日志文件"""
+        with self._lock:
+            if self._journal is not None:
+                self._compact_journal_locked()
+    
+    def _compact_journal_locked(self) -> None:
+        """压缩任务日志（调用方需持有锁）"""
+        temp_path = self._journal_path.with_name(self._journal_path.name + ".tmp")
+        
+        # 按各状态队列顺序写入，回放后队列顺序保持不变
+        with open(temp_path, 'wb') as f:
+            written = set()
+            for status in TaskStatus:
+                for task_id in self._live_queue_ids(status):
+                    f.write(self._encode_journal_record({"op": "put", "task": self.tasks[task_id]}))
+                    written.add(task_id)
+            for task_id, task in self.tasks.items():
+                if task_id not in written:
+                    f.write(self._encode_journal_record({"op": "put", "task": task}))
+        
+        self._journal.close()
+        os.replace(temp_path, self._journal_path)
+        self._journal = open(self._journal_path, 'ab')
+    
+    def _replay_journal(self, path: Path) -> None:
+        """回放任务日志，重建队列"""
+        # 按每个任务最后一条记录的顺序排列，回放后各队列顺序与记录时一致
+        tasks: Dict[str, BatchTask] = {}
+        
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # 异常退出时最后一条记录可能不完整
+                    self.logger.warning(f"跳过无法解析的任务日志记录: {path}")
+                    continue
+                
+                if record.get("op") == "put":
+                    task = BatchTask.from_dict(record["task"])
+                    tasks.pop(task.id, None)
+                    tasks[task.id] = task
+                elif record.get("op") == "delete":
+                    for task_id in record.get("ids", []):
+                        tasks.pop(task_id, None)
+        
+        by_status = self._new_status_table()
+        for task_id, task in tasks.items():
+            # 上次退出时仍在执行的任务不会再有结果，恢复为待执行以便重新调度
+            if task.status == TaskStatus.RUNNING:
+                task.status = TaskStatus.PENDING
+                task.started_at = None
+            queue, task_ids = by_status[task.status]
+            if task.status != TaskStatus.PENDING:
+                queue.append(task_id)
+            task_ids.add(task_id)
+        
+        with self._lock:
+            self.tasks = tasks
+            self._reset_order(list(tasks))
+            self._by_status = by_status
+            self._pending_heap = self._build_pending_heap(list(tasks), tasks)
+            self._version += 1
+            self._task_available.notify_all()
+        
+        self.logger.info(f"任务日志回放完成: {path}, 共 {len(tasks)} 个任务")
+    
+    @staticmethod
+    def _encode_journal_record(record: Dict[str, Any]) -> bytes:
+        """编码一条任务日志记录"""
+        return orjson.dumps(record, default=_json_default, option=orjson.OPT_APPEND_NEWLINE)
+    
+    def _journal_write(self, record: Dict[str, Any]) -> None:
+        """追加一条任务日志记录（调用方需持有锁）"""
+        if self._journal is None:
+            return
+        try:
+            self._journal.write(self._encode_journal_record(record))
+        except Exception as e:
+            self.logger.error(f"写入任务日志失败: {e}")
+    
+    def _journal_put(self, task: BatchTask) -> None:
+        """记录任务的最新状态（调用方需持有锁）"""
+        if self._journal is not None:
+            self._journal_write({"op": "put", "task": task})
+    
+    def _journal_flush(self) -> None:
+        """将任务日志写入磁盘（调用方需持有锁）"""
+        if self._journal is None:
+            return
+        try:
+            self._journal.flush()
+        except Exception as e:
+            self.logger.error(f"写入任务日志失败: {e}")
 
 
 class ProgressTracker:
@@ -447,24 +912,95 @@ class ProgressTracker:
     
     def __init__(self):
         """初始化进度追踪器"""
-        self.progress_callbacks: List[Callable[[Dict[str, Any]], None]] = []
+        self.progress_callbacks: List[Callable[[Dict[str, Any]], Any]] = []
         self.logger = logging.getLogger(__name__)
         
-    def add_progress_callback(self, callback: Callable[[Dict[str, Any]], None]) -> None:
-        """添加进度回调函数"""
+        # 最近一次进度计算结果：(队列, 队列版本号, 进度数据)
+        self._progress_cache: Optional[tuple] = None
+        
+        # 协程回调所属的事件循环，以及已提交但尚未完成的回调任务（保留引用防止被回收）
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending_tasks: Set[asyncio.Task] = set()
+        
+    def add_progress_callback(self, callback: Callable[[Dict[str, Any]], Any]) -> None:
+        """添加进度回调函数（支持普通函数和协程函数）"""
         self.progress_callbacks.append(callback)
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
     
     def update_progress(self, progress_data: Dict[str, Any]) -> None:
-        """更新进度"""
+        """更新进度（同步调用，异步回调函数并发执行）"""
+        async_callbacks = []
         for callback in self.progress_callbacks:
+            if asyncio.iscoroutinefunction(callback):
+                async_callbacks.append(callback)
+                continue
             try:
                 callback(progress_data)
             except Exception as e:
                 self.logger.error(f"进度回调函数执行失败: {e}")
+        
+        if not async_callbacks:
+            return
+        
+        gathering = self._gather_callbacks([callback(progress_data) for callback in async_callbacks])
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if loop is not None:
+            task = loop.create_task(gathering)
+            self._pending_tasks.add(task)
+            task.add_done_callback(self._pending_tasks.discard)
+            return
+        
+        # 当前线程没有事件循环：提交到回调所属的事件循环执行
+        owner = self._loop
+        if owner is not None and owner.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(gathering, owner)
+                return
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+        
+        # 不存在可用的事件循环时才临时创建
+        asyncio.run(gathering)
+    
+    async def update_progress_async(self, progress_data: Dict[str, Any]) -> None:
+        """异步更新进度，所有回调函数并发执行"""
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        await self._gather_callbacks([
+            callback(progress_data) if asyncio.iscoroutinefunction(callback)
+            else loop.run_in_executor(None, callback, progress_data)
+            for callback in self.progress_callbacks
+        ])
+    
+    async def _gather_callbacks(self, awaitables: List[Any]) -> None:
+        """并发等待回调函数执行完成并记录失败"""
+        results = await asyncio.gather(*awaitables, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.error(f"进度回调函数执行失败: {result}")
     
     def calculate_progress(self, queue: TaskQueue) -> Dict[str, Any]:
         """计算总体进度"""
-        status = queue.get_queue_status()
+        # 队列计数未变化时直接复用上次结果（先读版本号，保证缓存不会比数据新）
+        version = queue.version
+        cached = self._progress_cache
+        if cached and cached[0] is queue and cached[1] == version:
+            return dict(cached[2])
+        
+        progress = self._compute_progress(queue.get_queue_status())
+        self._progress_cache = (queue, version, progress)
+        return dict(progress)
+    
+    def _compute_progress(self, status: Dict[str, int]) -> Dict[str, Any]:
+        """根据队列状态计数计算进度数据"""
         total = status["total"]
         
         if total == 0:
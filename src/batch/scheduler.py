@@ -3,19 +3,119 @@
 负责执行批处理任务，管理并发执行和错误处理
 """
 import asyncio
+import functools
 import logging
+import os
+import re
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, Any, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable, Set, List, Tuple, AsyncIterator
 from pathlib import Path
 
 from .core import BatchTask, TaskStatus, TaskType, task_queue, progress_tracker
-from ..api.client import api_client
-from ..utils.file_handler import file_processor
+from ..api.client import get_api_client
+from ..utils.file_handler import get_file_processor, verify_image_file
 from ..utils.config import config_manager
 
 
+# 文件名中的非法字符和空白字符
+_ILLEGAL_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _run_coroutine(coro) -> Any:
+    """
+    在新的事件循环中运行协程
+    
+    安装了uvloop（0.18及以上版本提供uvloop.run）时使用uvloop事件循环，
+    否则使用默认事件循环；不修改全局事件循环策略
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(coro)
+    
+    run = getattr(uvloop, "run", None)
+    if run is None:
+        return asyncio.run(coro)
+    return run(coro)
+
+
+class AdaptiveLimiter:
+    """
+    自适应并发限制器（AIMD）
+    
+    接口限流或服务端出错时并发上限减半，持续成功时每隔一段时间加一，最高不超过配置上限
+    """
+    
+    def __init__(self, max_limit: int, increase_interval: float = 10.0):
+        """
+        初始化并发限制器
+        
+        Args:
+            max_limit: 并发上限
+            increase_interval: 成功后增加并发的最短间隔（秒）
+        """
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.increase_interval = increase_interval
+        self._in_use = 0
+        self._last_change = time.monotonic()
+        # 并发上限减半的次数；请求开始前记录，限流响应只在期间没有减半过时才再次减半
+        self._decrease_epoch = 0
+        # 条件变量绑定事件循环，调度器每次启动时重新创建
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._condition: Optional[asyncio.Condition] = None
+    
+    def _get_condition(self) -> asyncio.Condition:
+        """获取当前事件循环的条件变量"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+            self._in_use = 0
+        return self._condition
+    
+    async def acquire(self) -> int:
+        """
+        获取一个并发名额
+        
+        Returns:
+            获取名额时的减半次数，归还名额时传给release
+        """
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self._in_use < self.limit)
+            self._in_use += 1
+            return self._decrease_epoch
+    
+    async def release(self, epoch: int, throttled: bool = False) -> None:
+        """
+        归还并发名额并调整并发上限
+        
+        同一时段内并发请求同时被限流时只减半一次：
+        请求开始后上限已经减半过的，其限流响应不再减半
+        
+        Args:
+            epoch: acquire返回的减半次数
+            throttled: 本次请求是否被限流或遇到服务端错误
+        """
+        condition = self._get_condition()
+        async with condition:
+            self._in_use -= 1
+            now = time.monotonic()
+            if throttled:
+                if epoch == self._decrease_epoch:
+                    self.limit = max(1, self.limit // 2)
+                    self._decrease_epoch += 1
+                self._last_change = now
+            elif self.limit < self.max_limit and now - self._last_change >= self.increase_interval:
+                self.limit += 1
+                self._last_change = now
+            condition.notify_all()
+
+
 class TaskExecutor:
     """任务执行器"""
     
@@ -23,8 +123,18 @@ class TaskExecutor:
         """初始化任务执行器"""
         self.config = config_manager
         self.logger = logging.getLogger(__name__)
+        # 图像下载线程池，所有任务共享，限制同时下载的数量
+        self._download_executor = ThreadPoolExecutor(
+            max_workers=self.config.get("download.max_concurrent", 8),
+            thread_name_prefix="seedream-download"
+        )
+        # API请求并发限制，根据限流情况自适应调整
+        self._api_limiter = AdaptiveLimiter(self.config.get("api.max_concurrency", 8))
+        # 已创建的输出目录及其中已有的文件名，每个目录只创建和扫描一次
+        self._dir_names: Dict[Path, Set[str]] = {}
+        self._dir_names_lock = threading.Lock()
     
-    def execute_task(self, task: BatchTask) -> Dict[str, Any]:
+    async def execute_task(self, task: BatchTask) -> Dict[str, Any]:
         """
         执行单个任务
         
@@ -35,17 +145,17 @@ class TaskExecutor:
             执行结果
         """
         try:
-            self.logger.info(f"开始执行任务: {task.id} ({task.task_type.value})")
+            self.logger.info("开始执行任务: %s (%s)", task.id, task.task_type.value)
             
             # 根据任务类型执行不同的操作
             if task.task_type == TaskType.TEXT_TO_IMAGE:
-                return self._execute_text_to_image(task)
+                return await self._execute_text_to_image(task)
             elif task.task_type == TaskType.IMAGE_TO_IMAGE:
-                return self._execute_image_to_image(task)
+                return await self._execute_image_to_image(task)
             elif task.task_type == TaskType.IMAGE_EDIT:
-                return self._execute_image_edit(task)
+                return await self._execute_image_edit(task)
             elif task.task_type == TaskType.VIDEO_GENERATION:
-                return self._execute_video_generation(task)
+                return await self._execute_video_generation(task)
             else:
                 raise ValueError(f"不支持的任务类型: {task.task_type}")
                 
@@ -57,24 +167,21 @@ class TaskExecutor:
                 "task_id": task.id
             }
     
-    def _execute_text_to_image(self, task: BatchTask) -> Dict[str, Any]:
+    async def _execute_text_to_image(self, task: BatchTask) -> Dict[str, Any]:
         """执行文生图任务"""
-        # 准备参数
-        params = {
-            "prompt": task.prompt,
-            "size": task.parameters.get("size", "2K"),
-            "num_images": task.parameters.get("num_images", 1),
-            "watermark": task.parameters.get("watermark", True),
-            **{k: v for k, v in task.parameters.items() 
-               if k not in ["size", "num_images", "watermark"]}
-        }
+        # 准备参数（复制一次任务参数，再补充默认值）
+        params = dict(task.parameters)
+        params.setdefault("size", "2K")
+        params.setdefault("num_images", 1)
+        params.setdefault("watermark", True)
+        params["prompt"] = task.prompt
         
         # 调用API
-        result = api_client.text_to_image(**params)
+        result = await self._call_api(get_api_client().async_text_to_image, **params)
         
         if result.get("success"):
             # 下载生成的图像
-            downloaded_files = self._download_generated_images(
+            downloaded_files = await self.download_generated_images(
                 result["images"], task.output_dir, task.prompt
             )
             
@@ -83,27 +190,24 @@ class TaskExecutor:
         
         return result
     
-    def _execute_image_to_image(self, task: BatchTask) -> Dict[str, Any]:
+    async def _execute_image_to_image(self, task: BatchTask) -> Dict[str, Any]:
         """执行图生图任务"""
-        # 准备参数
-        params = {
-            "prompt": task.prompt,
-            "image_paths": task.input_files,
-            "image_urls": task.input_urls,
-            "size": task.parameters.get("size", "2K"),
-            "num_images": task.parameters.get("num_images", 1),
-            "watermark": task.parameters.get("watermark", True),
-            "mode": task.parameters.get("mode", "edit"),
-            **{k: v for k, v in task.parameters.items() 
-               if k not in ["size", "num_images", "watermark", "mode"]}
-        }
+        # 准备参数（复制一次任务参数，再补充默认值）
+        params = dict(task.parameters)
+        params.setdefault("size", "2K")
+        params.setdefault("num_images", 1)
+        params.setdefault("watermark", True)
+        params.setdefault("mode", "edit")
+        params["prompt"] = task.prompt
+        params["image_paths"] = task.input_files
+        params["image_urls"] = task.input_urls
         
         # 调用API
-        result = api_client.image_to_image(**params)
+        result = await self._call_api(get_api_client().async_image_to_image, **params)
         
         if result.get("success"):
             # 下载生成的图像
-            downloaded_files = self._download_generated_images(
+            downloaded_files = await self.download_generated_images(
                 result["images"], task.output_dir, task.prompt
             )
             
@@ -112,36 +216,46 @@ class TaskExecutor:
         
         return result
     
-    def _execute_image_edit(self, task: BatchTask) -> Dict[str, Any]:
+    async def _call_api(self, method: Callable[..., Any], **params) -> Dict[str, Any]:
+        """在并发限制内调用API，限流（429）或服务端错误（5xx）时降低并发"""
+        epoch = await self._api_limiter.acquire()
+        throttled = False
+        try:
+            result = await method(**params)
+            status_code = result.get("status_code")
+            throttled = status_code is not None and (status_code == 429 or status_code >= 500)
+            return result
+        finally:
+            await self._api_limiter.release(epoch, throttled)
+    
+    async def _execute_image_edit(self, task: BatchTask) -> Dict[str, Any]:
         """执行图像编辑任务"""
         # 图像编辑实际上也是图生图的一种模式
-        task.parameters["mode"] = "edit"
-        return self._execute_image_to_image(task)
+        task.set_parameter("mode", "edit")
+        return await self._execute_image_to_image(task)
     
-    def _execute_video_generation(self, task: BatchTask) -> Dict[str, Any]:
+    async def _execute_video_generation(self, task: BatchTask) -> Dict[str, Any]:
         """执行视频生成任务"""
         # 准备参数
-        params = {
-            "prompt": task.prompt,
-            "image_paths": task.input_files,
-            "image_urls": task.input_urls,
-            **task.parameters
-        }
+        params = dict(task.parameters)
+        params.setdefault("prompt", task.prompt)
+        params.setdefault("image_paths", task.input_files)
+        params.setdefault("image_urls", task.input_urls)
         
         # 调用API
-        result = api_client.video_generation(**params)
+        result = await get_api_client().async_video_generation(**params)
         
         # 注意：视频生成功能暂未实现
         return result
     
-    def _download_generated_images(
+    async def download_generated_images(
         self,
         images: list,
         output_dir: str,
         prompt_hint: str = ""
     ) -> list:
         """
-        下载生成的图像
+        并发下载生成的图像
         
         Args:
             images: 图像信息列表
@@ -149,52 +263,194 @@ class TaskExecutor:
             prompt_hint: 提示词提示（用于文件命名）
             
         Returns:
-            下载的文件路径列表
+            下载的文件路径列表（与图像顺序一致）
         """
-        downloaded_files = []
         output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
+        prompt_prefix = self._sanitize_filename(prompt_hint[:30]) if prompt_hint else "generated"
         
+        # 先依次确定文件名，保证文件名唯一
+        targets = []
         for i, image_info in enumerate(images):
             try:
                 url = image_info.get("url")
                 if not url:
                     continue
                 
-                # 生成文件名
-                prompt_prefix = self._sanitize_filename(prompt_hint[:30]) if prompt_hint else "generated"
-                filename = file_processor.generate_filename(
+                # 生成文件名（不含扩展名）
+                stem = get_file_processor().generate_filename(
                     prefix=prompt_prefix,
                     suffix=f"_{i+1}" if len(images) > 1 else "",
-                    extension=".png",
+                    extension="",
                     include_timestamp=True
                 )
                 
                 # 确保文件名唯一
-                filename = file_processor.create_unique_filename(
-                    output_path, filename.rsplit('.', 1)[0], '.png'
-                )
-                
-                file_path = output_path / filename
+                targets.append((url, output_path / self._reserve_filename(output_path, stem, ".png")))
                 
-                # 下载图像
-                if file_processor.download_image_from_url(url, file_path):
-                    downloaded_files.append(str(file_path))
-                    self.logger.info(f"图像下载成功: {file_path}")
-                else:
-                    self.logger.error(f"图像下载失败: {url}")
-                    
             except Exception as e:
                 self.logger.error(f"处理图像下载时出错: {e}")
         
+        # 相同URL归为一组，每组只下载一次
+        url_groups: Dict[str, List[Path]] = {}
+        for url, file_path in targets:
+            url_groups.setdefault(url, []).append(file_path)
+        
+        # 各组并发下载
+        results = await asyncio.gather(*(
+            self._fetch_image(url, file_paths) for url, file_paths in url_groups.items()
+        ), return_exceptions=True)
+        
+        # CancelledError 不是 Exception 子类，需按 BaseException 判断；清理占位文件后再向上传播取消
+        outcomes: Dict[Path, Any] = {}
+        cancelled: Optional[BaseException] = None
+        for file_paths, result in zip(url_groups.values(), results):
+            if isinstance(result, BaseException):
+                if isinstance(result, asyncio.CancelledError):
+                    cancelled = result
+                outcomes.update(dict.fromkeys(file_paths, result))
+            else:
+                outcomes.update(result)
+        
+        downloaded_files = []
+        for url, file_path in targets:
+            success = outcomes[file_path]
+            if success is True:
+                downloaded_files.append(str(file_path))
+                self.logger.info("图像下载成功: %s", file_path)
+                continue
+            
+            if isinstance(success, asyncio.CancelledError):
+                pass
+            elif isinstance(success, BaseException):
+                self.logger.error(f"处理图像下载时出错: {success}")
+            else:
+                self.logger.error("图像下载失败: %s", url)
+            # 删除保存失败的图像留下的占位文件
+            file_path.unlink(missing_ok=True)
+        
+        if cancelled is not None:
+            raise cancelled
         return downloaded_files
     
-    def _sanitize_filename(self, text: str) -> str:
+    async def _fetch_image(self, url: str, file_paths: List[Path]) -> Dict[Path, bool]:
+        """
+        将同一URL的图像保存到多个文件，已下载过的URL直接链接本地文件
+        
+        Args:
+            url: 图像URL
+            file_paths: 目标文件路径列表
+            
+        Returns:
+            各文件路径是否保存成功
+        """
+        loop = asyncio.get_running_loop()
+        processor = get_file_processor()
+        
+        outcome = {}
+        for file_path in file_paths:
+            # 已下载并验证过的URL由文件处理器记录，直接链接本地文件（阻塞I/O在下载线程池中执行）
+            success = await loop.run_in_executor(
+                self._download_executor, processor.reuse_download, url, file_path, False
+            )
+            if not success:
+                success = await loop.run_in_executor(
+                    self._download_executor,
+                    functools.partial(
+                        processor.download_image_from_url, url, file_path,
+                        create_parent=False, validate=False
+                    )
+                )
+                if success:
+                    success = await self._verify_downloaded_image(file_path)
+                if success:
+                    # 进程池验证通过后才记录，验证失败删除的文件不会被复用
+                    processor.remember_download(url, file_path)
+            outcome[file_path] = success
+        
+        return outcome
+    
+    async def _verify_downloaded_image(self, file_path: Path) -> bool:
+        """在下载线程池中校验下载的图像，无效时删除文件"""
+        # 校验只解析文件头，单张约数毫秒且Pillow解码时释放GIL；实测进程池并无收益，使用线程池即可
+        processor = get_file_processor()
+        is_valid, error_msg = await asyncio.get_running_loop().run_in_executor(
+            self._download_executor, verify_image_file, str(file_path),
+            processor.supported_formats, processor.max_size_mb
+        )
+        if not is_valid:
+            file_path.unlink(missing_ok=True)  # 删除无效文件
+            self.logger.error(f"下载的文件无效: {error_msg}")
+        return is_valid
+    
+    def _reserve_filename(self, output_path: Path, stem: str, extension: str) -> str:
+        """
+        在输出目录中选定唯一的文件名
+        
+        首次使用某个目录时创建目录并扫描已有文件名，之后在内存中排除已占用的名称，
+        并以独占方式创建占位文件：文件已被其他进程写入时换下一个名称，不会覆盖；
+        创建失败提示目录不存在时才重新创建目录，平时不再逐个查询文件系统
+        
+        Args:
+            output_path: 输出目录
+            stem: 基础文件名（不含扩展名）
+            extension: 文件扩展名
+            
+        Returns:
+            唯一的文件名
+        """
+        with self._dir_names_lock:
+            names = self._dir_names.get(output_path)
+            if names is None:
+                names = self._scan_output_dir(output_path)
+                self._dir_names[output_path] = names
+            
+            # 文件名已存在时添加数字后缀
+            filename = f"{stem}{extension}"
+            counter = 1
+            rescanned = False
+            while True:
+                if filename not in names:
+                    try:
+                        os.close(os.open(
+                            output_path / filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY
+                        ))
+                        names.add(filename)
+                        return filename
+                    except FileExistsError:
+                        # 首次扫描后由其他进程写入的文件
+                        names.add(filename)
+                    except FileNotFoundError:
+                        # 运行期间输出目录被删除，重新创建并扫描后从基础文件名重新选择
+                        if rescanned:
+                            raise
+                        rescanned = True
+                        names = self._scan_output_dir(output_path)
+                        self._dir_names[output_path] = names
+                        filename = f"{stem}{extension}"
+                        counter = 1
+                        continue
+                
+                filename = f"{stem}_{counter}{extension}"
+                counter += 1
+    
+    @staticmethod
+    def _scan_output_dir(output_path: Path) -> Set[str]:
+        """创建输出目录并列出其中已有的文件名"""
+        output_path.mkdir(parents=True, exist_ok=True)
+        try:
+            with os.scandir(output_path) as entries:
+                return {entry.name for entry in entries}
+        except FileNotFoundError:
+            # 创建后又被删除，再创建一次
+            output_path.mkdir(parents=True, exist_ok=True)
+            return set()
+    
+    @staticmethod
+    def _sanitize_filename(text: str) -> str:
         """清理文件名中的非法字符"""
-        import re
         # 移除或替换非法字符
-        sanitized = re.sub(r'[<>:"/\\|?*]', '_', text)
-        sanitized = re.sub(r'\s+', '_', sanitized)
+        sanitized = _ILLEGAL_FILENAME_CHARS.sub('_', text)
+        sanitized = _WHITESPACE.sub('_', sanitized)
         return sanitized.strip('_')
 
 
@@ -211,11 +467,21 @@ class TaskScheduler:
         self.max_concurrent_tasks = self.config.get("batch.max_concurrent_tasks", 5)
         self.auto_retry = self.config.get("batch.auto_retry", True)
         self.retry_delay = self.config.get("batch.retry_delay", 5)
+        # 停止时等待执行中任务的总时长（秒）
+        self.shutdown_timeout = self.config.get("batch.shutdown_timeout", 30)
         
         # 运行状态
         self.is_running = False
         self.should_stop = False
+        # 暂停时不再取新任务，执行中的任务、线程池和连接保持不变
+        self.is_paused = False
         self._scheduler_thread: Optional[threading.Thread] = None
+        # 调度事件循环（在调度线程中运行）
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # 停止信号，用于提前结束重试等待（在事件循环中创建）
+        self._stop_event: Optional[asyncio.Event] = None
+        # 恢复信号，暂停期间调度循环等待该信号（在事件循环中创建）
+        self._resume_event: Optional[asyncio.Event] = None
         
         # 状态回调
         self.status_callbacks: list = []
@@ -224,9 +490,74 @@ class TaskScheduler:
         """添加状态回调函数"""
         self.status_callbacks.append(callback)
     
+    async def run_async(self, tasks: List[BatchTask]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        将任务加入队列，并按完成顺序异步产出任务结果
+        
+        结果通过状态回调从调度线程转发到调用方的事件循环，等待期间不阻塞调用方。
+        所有任务结束或调度器停止时迭代结束。
+        
+        Args:
+            tasks: 要执行的任务列表
+            
+        Yields:
+            任务结果，包含task、success以及result或error
+        """
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        
+        def forward_status(event: str, data: Dict[str, Any]) -> None:
+            if event not in ("task_completed", "task_failed", "scheduler_stopped"):
+                return
+            try:
+                loop.call_soon_threadsafe(events.put_nowait, (event, data))
+            except RuntimeError:
+                # 调用方事件循环已关闭
+                pass
+        
+        pending_ids = {task.id for task in tasks}
+        # 先注册回调再入队，避免遗漏入队后立即完成的任务
+        self.add_status_callback(forward_status)
+        try:
+            task_queue.add_tasks(tasks)
+            
+            while pending_ids:
+                event, data = await events.get()
+                if event == "scheduler_stopped":
+                    break
+                
+                task = data["task"]
+                if task.id not in pending_ids:
+                    continue
+                pending_ids.discard(task.id)
+                
+                if event == "task_completed":
+                    yield {"task": task, "success": True, "result": data["result"]}
+                else:
+                    yield {"task": task, "success": False, "error": data["error"]}
+        finally:
+            self.status_callbacks.remove(forward_status)
+    
     def _notify_status(self, event: str, data: Dict[str, Any]) -> None:
-        """通知状态变化"""
-        for callback in self.status_callbacks:
+        """通知状态变化（调度线程外的通知转到事件循环中执行）"""
+        if not self.status_callbacks:
+            return
+        
+        loop = self._loop
+        if loop is not None and threading.current_thread() is not self._scheduler_thread:
+            try:
+                loop.call_soon_threadsafe(self._dispatch_status, event, data)
+                return
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+        
+        self._dispatch_status(event, data)
+    
+    def _dispatch_status(self, event: str, data: Dict[str, Any]) -> None:
+        """调用状态回调函数"""
+        # 遍历快照，回调执行期间增删回调不影响本次通知
+        for callback in tuple(self.status_callbacks):
             try:
                 callback(event, data)
             except Exception as e:
@@ -235,15 +566,19 @@ class TaskScheduler:
     def start(self) -> None:
         """启动调度器"""
         if self.is_running:
-            self.logger.warning("调度器已在运行中")
+            if self.is_paused:
+                self.resume()
+            else:
+                self.logger.warning("调度器已在运行中")
             return
         
         self.is_running = True
         self.should_stop = False
+        self.is_paused = False
         
         # 启动调度线程
         self._scheduler_thread = threading.Thread(
-            target=self._scheduler_loop,
+            target=self._run_event_loop,
             name="TaskScheduler",
             daemon=True
         )
@@ -258,78 +593,165 @@ class TaskScheduler:
             return
         
         self.should_stop = True
+        # 唤醒正在等待新任务的调度循环
+        task_queue.wake_waiters()
+        # 唤醒正在等待重试的任务
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._stop_event.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
         
         # 等待调度线程结束
         if self._scheduler_thread and self._scheduler_thread.is_alive():
-            self._scheduler_thread.join(timeout=10)
+            self._scheduler_thread.join(timeout=self.shutdown_timeout + 1)
         
         self.is_running = False
         self.logger.info("任务调度器已停止")
         self._notify_status("scheduler_stopped", {})
     
-    def _scheduler_loop(self) -> None:
+    def _run_event_loop(self) -> None:
+        """调度线程入口：运行调度事件循环"""
+        _run_coroutine(self._scheduler_loop())
+    
+    async def _scheduler_loop(self) -> None:
         """调度器主循环"""
-        with ThreadPoolExecutor(max_workers=self.max_concurrent_tasks) as executor:
-            futures = {}
-            
+        self._stop_event = asyncio.Event()
+        self._resume_event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        # 固定数量的执行槽位，每个槽位为 (执行中的任务, 批处理任务) 或 None
+        slots: List[Optional[Tuple[asyncio.Future, BatchTask]]] = [None] * self.max_concurrent_tasks
+        # 等待新任务的取任务操作（有空闲槽位时才发起）
+        intake: Optional[asyncio.Future] = None
+        # 停止信号，槽位已满时也能及时退出等待
+        stopping = asyncio.ensure_future(self._stop_event.wait())
+        # 暂停期间等待恢复信号
+        resuming: Optional[asyncio.Future] = None
+        
+        try:
             while not self.should_stop:
                 try:
-                    # 检查是否有任务可以执行
-                    while len(futures) < self.max_concurrent_tasks and not self.should_stop:
-                        task = task_queue.get_next_task()
-                        if not task:
-                            break
-                        
-                        # 提交任务执行
-                        future = executor.submit(self._execute_task_with_retry, task)
-                        futures[future] = task
-                        
-                        self.logger.info(f"任务已提交执行: {task.id}")
+                    if intake is None and None in slots and not self.is_paused:
+                        intake = asyncio.ensure_future(task_queue.get_next_task_async(
+                            cancelled=lambda: self.should_stop or self.is_paused
+                        ))
+                    
+                    if self.is_paused and resuming is None:
+                        self._resume_event.clear()
+                        # 清除前可能已恢复，需再次检查
+                        if self.is_paused:
+                            resuming = asyncio.ensure_future(self._resume_event.wait())
                     
-                    # 检查完成的任务
-                    if futures:
-                        # 使用短超时来避免阻塞
-                        completed_futures = []
-                        for future in as_completed(futures, timeout=1):
-                            completed_futures.append(future)
-                        
-                        for future in completed_futures:
-                            task = futures.pop(future)
-                            try:
-                                result = future.result()
-                                self._handle_task_completion(task, result)
-                            except Exception as e:
-                                self.logger.error(f"任务执行异常: {task.id}, 错误: {e}")
-                                self._handle_task_failure(task, str(e))
+                    # 阻塞直到有新任务到达、任意任务完成、收到停止或恢复信号
+                    waiting = {slot[0] for slot in slots if slot is not None}
+                    waiting.add(stopping)
+                    if intake is not None:
+                        waiting.add(intake)
+                    if resuming is not None:
+                        waiting.add(resuming)
+                    done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
                     
-                    # 更新进度
-                    self._update_progress()
+                    if resuming in done:
+                        resuming = None
                     
-                    # 短暂休眠避免忙等待
-                    time.sleep(0.1)
+                    # 批量处理本轮完成的任务，释放槽位
+                    state_changed = False
+                    for index, slot in enumerate(slots):
+                        if slot is not None and slot[0] in done:
+                            slots[index] = None
+                            self._handle_finished_job(slot[1], slot[0])
+                            state_changed = True
+                    
+                    # 提交新任务执行
+                    if intake in done:
+                        finished_intake, intake = intake, None
+                        task = finished_intake.result()
+                        # 已就绪的任务直接出队填满空闲槽位，不再逐个等待
+                        # Seedream生成接口每次请求只接受一个提示词，多张图像为同一提示词的组图，
+                        # 因此不同任务无法合并到一次请求中，只能以并发槽位摊薄网络往返
+                        while task is not None:
+                            index = slots.index(None)
+                            job = asyncio.ensure_future(self._execute_task_with_retry(task))
+                            slots[index] = (job, task)
+                            self.logger.info("任务已提交执行: %s (槽位 %d)", task.id, index)
+                            state_changed = True
+                            
+                            if None not in slots or self.should_stop:
+                                break
+                            task = task_queue.get_next_task()
+                    
+                    # 仅在任务状态变化时更新进度
+                    if state_changed:
+                        await self._update_progress()
                     
                 except Exception as e:
                     self.logger.error(f"调度器循环异常: {e}")
-                    time.sleep(1)
+                    await asyncio.sleep(1)
             
-            # 等待所有正在执行的任务完成
-            for future in futures:
-                try:
-                    future.result(timeout=30)
-                except Exception as e:
-                    self.logger.error(f"等待任务完成时出错: {e}")
+            # 停止时已取出但未提交的任务放回待执行队列
+            if intake is not None:
+                task = await intake
+                if task is not None:
+                    task_queue.update_task_status(task.id, TaskStatus.PENDING)
+            
+            # 在总时长内等待所有正在执行的任务完成（重试等待已被停止信号唤醒）
+            running = [slot for slot in slots if slot is not None]
+            if running:
+                done, not_done = await asyncio.wait(
+                    [job for job, _ in running], timeout=self.shutdown_timeout
+                )
+                for job, task in running:
+                    if job in done:
+                        self._handle_finished_job(task, job)
+                
+                # 超时未完成的任务取消执行，放回待执行队列
+                for job in not_done:
+                    job.cancel()
+                await asyncio.gather(*not_done, return_exceptions=True)
+                for job, task in running:
+                    if job in not_done:
+                        self._requeue_task(task, "停止时任务未完成，已放回队列")
+                
+                await self._update_progress()
+        finally:
+            stopping.cancel()
+            if resuming is not None:
+                resuming.cancel()
+            self._loop = None
     
-    def _execute_task_with_retry(self, task: BatchTask) -> Dict[str, Any]:
+    def _handle_finished_job(self, task: BatchTask, job: asyncio.Future) -> None:
+        """处理已结束的任务执行"""
+        try:
+            result = job.result()
+            if result.get("cancelled"):
+                self._requeue_task(task, "停止时任务在等待重试，已放回队列")
+                return
+            self._handle_task_completion(task, result)
+        except Exception as e:
+            self.logger.error(f"任务执行异常: {task.id}, 错误: {e}")
+            self._handle_task_failure(task, str(e))
+    
+    async def _execute_task_with_retry(self, task: BatchTask) -> Dict[str, Any]:
         """执行任务（包含重试逻辑）"""
         max_retries = task.max_retries if self.auto_retry else 0
         
         for attempt in range(max_retries + 1):
             try:
                 if attempt > 0:
-                    self.logger.info(f"重试任务: {task.id}, 第 {attempt} 次重试")
-                    time.sleep(self.retry_delay)
+                    self.logger.info("重试任务: %s, 第 %d 次重试", task.id, attempt)
+                    # 等待重试间隔，调度器停止时立即结束
+                    if await self._wait_for_stop(self.retry_delay):
+                        # 停止不计为失败，由调度循环将任务放回待执行队列
+                        return {
+                            "success": False,
+                            "cancelled": True,
+                            "error": "调度器已停止",
+                            "task_id": task.id
+                        }
                 
-                result = self.executor.execute_task(task)
+                result = await self.executor.execute_task(task)
                 
                 if result.get("success"):
                     return result
@@ -340,7 +762,7 @@ class TaskScheduler:
                     
                     # 否则记录错误并继续重试
                     error = result.get("error", "未知错误")
-                    self.logger.warning(f"任务执行失败，将重试: {task.id}, 错误: {error}")
+                    self.logger.warning("任务执行失败，将重试: %s, 错误: %s", task.id, error)
                     task.retry_count = attempt + 1
                     
             except Exception as e:
@@ -351,7 +773,7 @@ class TaskScheduler:
                         "task_id": task.id
                     }
                 
-                self.logger.warning(f"任务执行异常，将重试: {task.id}, 错误: {e}")
+                self.logger.warning("任务执行异常，将重试: %s, 错误: %s", task.id, e)
                 task.retry_count = attempt + 1
         
         return {
@@ -360,6 +782,19 @@ class TaskScheduler:
             "task_id": task.id
         }
     
+    async def _wait_for_stop(self, timeout: float) -> bool:
+        """等待停止信号，在超时前收到时返回True"""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    def _requeue_task(self, task: BatchTask, reason: str) -> None:
+        """将因调度器停止而中断的任务放回待执行队列"""
+        self.logger.warning(f"{reason}: {task.id}")
+        task_queue.update_task_status(task.id, TaskStatus.PENDING)
+    
     def _handle_task_completion(self, task: BatchTask, result: Dict[str, Any]) -> None:
         """处理任务完成"""
         if result.get("success"):
@@ -368,7 +803,7 @@ class TaskScheduler:
                 TaskStatus.COMPLETED,
                 result=result
             )
-            self.logger.info(f"任务完成: {task.id}")
+            self.logger.info("任务完成: %s", task.id)
             self._notify_status("task_completed", {"task": task, "result": result})
         else:
             self._handle_task_failure(task, result.get("error", "未知错误"))
@@ -380,30 +815,53 @@ class TaskScheduler:
             TaskStatus.FAILED,
             error_message=error
         )
-        self.logger.error(f"任务失败: {task.id}, 错误: {error}")
+        self.logger.error("任务失败: %s, 错误: %s", task.id, error)
         self._notify_status("task_failed", {"task": task, "error": error})
     
-    def _update_progress(self) -> None:
+    async def _update_progress(self) -> None:
         """更新进度"""
         progress_data = progress_tracker.calculate_progress(task_queue)
-        progress_tracker.update_progress(progress_data)
+        await progress_tracker.update_progress_async(progress_data)
     
     def pause(self) -> None:
-        """暂停调度器"""
-        # 这里可以实现暂停逻辑
-        # 目前简单实现为停止
-        self.stop()
+        """暂停调度器：不再提交新任务，执行中的任务继续完成"""
+        if not self.is_running or self.is_paused:
+            return
+        
+        self.is_paused = True
+        # 唤醒正在等待新任务的调度循环，使其不再取任务
+        task_queue.wake_waiters()
+        
+        self.logger.info("任务调度器已暂停")
+        self._notify_status("scheduler_paused", {})
     
     def resume(self) -> None:
         """恢复调度器"""
         # 如果已停止，重新启动
         if not self.is_running:
             self.start()
+            return
+        
+        if not self.is_paused:
+            return
+        
+        self.is_paused = False
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._resume_event.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+        
+        self.logger.info("任务调度器已恢复")
+        self._notify_status("scheduler_resumed", {})
     
     def get_status(self) -> Dict[str, Any]:
         """获取调度器状态"""
         return {
             "is_running": self.is_running,
+            "is_paused": self.is_paused,
             "max_concurrent_tasks": self.max_concurrent_tasks,
             "auto_retry": self.auto_retry,
             "retry_delay": self.retry_delay,
@@ -1,6 +1,14 @@
 """
 UI模块初始化文件
 """
-from .main_interface import SeedreamUI, seedream_ui
+from typing import Any
 
-__all__ = ['SeedreamUI', 'seedream_ui']
\ No newline at end of file
+__all__ = ['SeedreamUI', 'get_seedream_ui', 'seedream_ui']
+
+
+def __getattr__(name: str) -> Any:
+    """按需导入主界面，导入简化界面时不加载调度器等重量级模块"""
+    if name in __all__:
+        from . import main_interface
+        return getattr(main_interface, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,19 +1,58 @@
 """
 Gradio用户界面主界面
 """
+import asyncio
 import gradio as gr
+import pandas as pd
 import logging
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, AsyncIterator
 from pathlib import Path
 import json
+import re
+import orjson
+import threading
 
 from ..batch import (
     TaskType, TaskStatus, task_generator, task_queue, 
     progress_tracker, task_scheduler
 )
 from ..utils.config import config_manager
-from ..utils.file_handler import directory_scanner, prompt_parser
-from ..api.client import api_client
+from ..utils.file_handler import get_directory_scanner, get_prompt_parser
+from ..utils.result_cache import result_cache
+from ..api.client import get_api_client
+
+
+# 每行一个提示词：匹配去除首尾空白后的非空行内容
+_PROMPT_LINE = re.compile(r'^\s*(\S(?:.*\S)?)', re.MULTILINE)
+
+
+def _format_payload(payload: Dict[str, Any]) -> str:
+    """将结果字典序列化为紧凑的JSON代码块（省略空值字段），供Markdown组件展示"""
+    compact = {key: value for key, value in payload.items() if value is not None}
+    return "```json\n" + orjson.dumps(compact, default=str).decode("utf-8") + "\n```"
+
+
+def _minify_css(css: str) -> str:
+    """去除CSS中的注释和多余空白，减小发送给浏览器的页面体积"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};,])\s*', r'\1', css).replace(';}', '}').strip()
+
+
+# 自定义CSS样式（模块加载时压缩一次）
+_CUSTOM_CSS = _minify_css("""
+.gradio-container {
+    max-width: 1400px !important;
+}
+
+#result_gallery {
+    min-height: 400px;
+}
+
+.progress-bar {
+    background: linear-gradient(90deg, #4CAF50, #8BC34A);
+}
+""")
 
 
 class SeedreamUI:
@@ -26,14 +65,48 @@ class SeedreamUI:
         
         # UI状态
         self.current_progress = {"progress_percentage": 0, "status": "idle"}
+        # 任务列表缓存：(队列版本号, 起始位置, 每页数量, 表格)
+        self._task_list_cache: Optional[Tuple[int, int, int, pd.DataFrame]] = None
+        # 订阅进度推送的 (事件循环, 队列)
+        self._progress_subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
         
         # 设置进度回调
         progress_tracker.add_progress_callback(self._update_progress_display)
         task_scheduler.add_status_callback(self._handle_scheduler_event)
     
     def _update_progress_display(self, progress_data: Dict[str, Any]) -> None:
-        """更新进度显示"""
+        """更新进度显示，并推送给所有进度订阅者"""
         self.current_progress = progress_data
+        # 进度回调在调度线程中执行，需转到订阅者所在的事件循环
+        for loop, queue in tuple(self._progress_subscribers):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, progress_data)
+            except RuntimeError:
+                # 订阅者事件循环已关闭
+                pass
+    
+    async def _stream_progress(
+        self,
+        progress: gr.Progress = gr.Progress()
+    ) -> AsyncIterator[str]:
+        """持续推送进度更新，直到前端断开连接"""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        self._progress_subscribers.append(subscriber)
+        try:
+            progress_data = self.current_progress
+            while True:
+                progress(
+                    progress_data.get("progress_percentage", 0) / 100,
+                    desc=progress_data.get("status", "")
+                )
+                yield str(progress_data)
+                
+                progress_data = await subscriber[1].get()
+                # 积压的更新只展示最新一次
+                while not subscriber[1].empty():
+                    progress_data = subscriber[1].get_nowait()
+        finally:
+            self._progress_subscribers.remove(subscriber)
     
     def _handle_scheduler_event(self, event: str, data: Dict[str, Any]) -> None:
         """处理调度器事件"""
@@ -56,7 +129,7 @@ class SeedreamUI:
             
             # 配置面板
             with gr.Accordion("⚙️ 系统配置", open=False):
-                self._create_config_panel()
+                model_info_md = self._create_config_panel()
             
             # 主功能面板
             with gr.Tabs() as main_tabs:
@@ -69,20 +142,23 @@ class SeedreamUI:
                     self._create_image_to_image_tab()
                 
                 # 批处理管理标签页
-                with gr.Tab("⚡ 批处理管理", id="batch_management"):
-                    self._create_batch_management_tab()
+                with gr.Tab("⚡ 批处理管理", id="batch_management") as batch_tab:
+                    self._create_batch_management_tab(batch_tab)
                 
                 # 进度监控标签页
-                with gr.Tab("📊 进度监控", id="progress_monitor"):
-                    self._create_progress_monitor_tab()
+                with gr.Tab("📊 进度监控", id="progress_monitor") as progress_tab:
+                    self._create_progress_monitor_tab(progress_tab)
             
             # 底部状态栏
             self._create_status_bar()
+            
+            # 模型信息在页面加载后获取，不在构建界面时查询
+            interface.load(fn=self._get_model_info, outputs=[model_info_md])
         
         return interface
     
-    def _create_config_panel(self) -> None:
-        """创建配置面板"""
+    def _create_config_panel(self) -> gr.Markdown:
+        """创建配置面板，返回模型信息组件"""
         with gr.Row():
             with gr.Column(scale=1):
                 api_key_input = gr.Textbox(
@@ -114,6 +190,8 @@ class SeedreamUI:
             fn=self._test_api_connection,
             outputs=[gr.Textbox(label="连接测试结果", visible=False)]
         )
+        
+        return model_info_md
     
     def _create_text_to_image_tab(self) -> None:
         """创建文生图标签页"""
@@ -292,8 +370,8 @@ class SeedreamUI:
             outputs=[processed_gallery, process_info_md]
         )
     
-    def _create_batch_management_tab(self) -> None:
-        """创建批处理管理标签页"""
+    def _create_batch_management_tab(self, tab: gr.Tab) -> None:
+        """创建批处理管理标签页（队列数据在切换到该标签页时加载）"""
         with gr.Row():
             with gr.Column(scale=1):
                 # 队列控制
@@ -314,12 +392,12 @@ class SeedreamUI:
                 with gr.Group():
                     gr.Markdown("### 队列状态")
                     # 使用Markdown组件替代JSON组件以避免兼容性问题
+                    # 队列计数为O(1)读取，由前端定时轮询刷新
                     queue_status_md = gr.Markdown(
                         label="队列状态",
-                        value="暂无队列信息"
+                        value=self._get_queue_status,
+                        every=self.config.get("ui.status_refresh_interval", 2.0)
                     )
-                    
-                    refresh_status_btn = gr.Button("刷新状态", size="sm")
             
             with gr.Column(scale=2):
                 # 任务列表
@@ -331,6 +409,21 @@ class SeedreamUI:
                     interactive=False
                 )
                 
+                # 只加载当前页的任务，避免大队列刷新时传输全部任务
+                with gr.Row():
+                    task_offset = gr.Number(
+                        label="起始位置",
+                        value=0,
+                        minimum=0,
+                        precision=0
+                    )
+                    task_limit = gr.Number(
+                        label="每页数量",
+                        value=self.config.get("ui.task_page_size", 100),
+                        minimum=1,
+                        precision=0
+                    )
+                
                 refresh_tasks_btn = gr.Button("刷新任务列表")
         
         # 事件绑定
@@ -349,25 +442,27 @@ class SeedreamUI:
             outputs=[queue_status_md]
         )
         
-        refresh_status_btn.click(
-            fn=self._get_queue_status,
-            outputs=[queue_status_md]
+        # 连续点击时只执行最后一次刷新
+        refresh_tasks_btn.click(
+            fn=self._get_task_list,
+            inputs=[task_offset, task_limit],
+            outputs=[task_list],
+            trigger_mode="always_last"
         )
         
-        refresh_tasks_btn.click(
+        tab.select(
             fn=self._get_task_list,
+            inputs=[task_offset, task_limit],
             outputs=[task_list]
         )
     
-    def _create_progress_monitor_tab(self) -> None:
-        """创建进度监控标签页"""
+    def _create_progress_monitor_tab(self, tab: gr.Tab) -> None:
+        """创建进度监控标签页（进度数据在切换到该标签页时刷新）"""
         with gr.Column():
             # 总体进度
             with gr.Group():
                 gr.Markdown("### 总体进度")
                 
-                progress_bar = gr.Progress()
-                
                 with gr.Row():
                     # 使用Markdown组件替代JSON组件以避免兼容性问题
                     progress_info_md = gr.Markdown(
@@ -396,6 +491,14 @@ class SeedreamUI:
                 with gr.Row():
                     refresh_log_btn = gr.Button("刷新日志", size="sm")
                     clear_log_btn = gr.Button("清空日志", size="sm")
+        
+        # 进度由进度跟踪器推送，选中标签页后持续更新，无需手动刷新
+        tab.select(
+            fn=self._stream_progress,
+            outputs=[progress_info_md],
+            concurrency_limit=None,
+            trigger_mode="once"
+        )
     
     def _create_status_bar(self) -> None:
         """创建底部状态栏"""
@@ -416,95 +519,191 @@ class SeedreamUI:
     
     def _get_custom_css(self) -> str:
         """获取自定义CSS样式"""
-        return """
-        .gradio-container {
-            max-width: 1400px !important;
-        }
-        
-        #result_gallery {
-            min-height: 400px;
-        }
-        
-        .progress-bar {
-            background: linear-gradient(90deg, #4CAF50, #8BC34A);
-        }
-        """
+        return _CUSTOM_CSS
     
     # UI事件处理方法
     def _save_api_key(self, api_key: str) -> str:
         """保存API密钥"""
         try:
-            if api_client.set_api_key(api_key):
+            if get_api_client().set_api_key(api_key):
                 return "API密钥保存成功"
             else:
                 return "API密钥保存失败"
         except Exception as e:
             return f"保存失败: {e}"
     
-    def _test_api_connection(self) -> str:
+    def _get_model_info(self) -> str:
+        """获取模型信息（Markdown格式）"""
+        try:
+            info = get_api_client().get_model_info()
+            features = "、".join(
+                name for name, enabled in info["features"].items() if enabled == "true"
+            )
+            return (
+                f"**模型**: {info['model']}\n\n"
+                f"**服务地址**: {info['base_url']}\n\n"
+                f"**支持尺寸**: {', '.join(info['supported_sizes'])}\n\n"
+                f"**功能**: {features}"
+            )
+        except Exception as e:
+            return f"获取模型信息失败: {e}"
+    
+    async def _test_api_connection(self) -> str:
         """测试API连接"""
         try:
-            if api_client.test_connection():
+            if await get_api_client().async_test_connection():
                 return "连接成功"
             else:
                 return "连接失败"
         except Exception as e:
             return f"连接测试失败: {e}"
     
-    def _generate_single_image(
+    async def _generate_single_image(
         self, 
         prompt: str, 
         size: str, 
         num_images: int
-    ) -> Tuple[List[str], Dict[str, Any]]:
-        """生成单个图像"""
-        try:
-            if not prompt.strip():
-                return [], {"error": "请输入提示词"}
-            
-            result = api_client.text_to_image(
+    ) -> AsyncIterator[Tuple[List[str], str]]:
+        """生成单个图像（每张图像生成完成后立即更新结果）"""
+        # 先校验输入，无效时直接返回
+        if not prompt or not prompt.strip():
+            yield [], _format_payload({"error": "请输入提示词"})
+            return
+        if size not in ("1K", "2K", "4K"):
+            yield [], _format_payload({"error": f"不支持的图像尺寸: {size}"})
+            return
+        num_images = int(num_images or 0)
+        if num_images < 1:
+            yield [], _format_payload({"error": "生成数量至少为1"})
+            return
+        
+        api_client = get_api_client()
+        # 相同请求直接返回缓存结果，不再调用付费接口
+        cache_key = result_cache.make_key(
+            p=prompt, s=size, n=num_images, m=api_client.model
+        )
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            yield [img["url"] for img in cached["images"]], _format_payload(cached)
+            return
+        
+        # 每张图像单独请求并发执行，按完成顺序逐张展示
+        jobs = [
+            asyncio.ensure_future(api_client.async_text_to_image(
                 prompt=prompt,
                 size=size,
-                num_images=num_images
-            )
-            
-            if result.get("success"):
+                num_images=1
+            ))
+            for _ in range(num_images)
+        ]
+        images: List[Dict[str, Any]] = []
+        errors: List[str] = []
+        try:
+            for job in asyncio.as_completed(jobs):
+                # 接口调用失败已转换为结果字典，这里只需处理执行器层面的异常
+                try:
+                    result = await job
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
+                
+                if result.get("success"):
+                    images.extend(result["images"])
+                else:
+                    errors.append(result.get("error", "未知错误"))
+                
                 # 这里应该下载图像并返回本地路径
                 # 暂时返回URL
-                image_urls = [img["url"] for img in result["images"]]
-                return image_urls, result
-            else:
-                return [], result
-                
-        except Exception as e:
-            return [], {"error": str(e)}
+                yield [img["url"] for img in images], _format_payload({
+                    "success": not errors,
+                    "completed": len(images),
+                    "failed": len(errors),
+                    "total": num_images,
+                    "errors": errors
+                })
+        finally:
+            # 生成被中断时取消尚未完成的请求
+            for job in jobs:
+                job.cancel()
+        
+        if not errors:
+            result_cache.set(cache_key, {
+                "success": True,
+                "images": images,
+                "prompt": prompt,
+                "model": api_client.model
+            })
     
-    def _generate_batch_images(
+    async def _generate_batch_images(
         self,
         batch_prompts: str,
         prompt_file: Optional[str],
         size: str,
-        output_dir: str
-    ) -> Dict[str, Any]:
-        """批量生成图像"""
+        output_dir: str,
+        progress: gr.Progress = gr.Progress()
+    ) -> AsyncIterator[str]:
+        """批量生成图像（调度器运行时持续推送任务完成进度）"""
         try:
             prompts = []
             
             # 处理文本输入的提示词
-            if batch_prompts.strip():
-                prompts.extend([
-                    line.strip() 
-                    for line in batch_prompts.split('\n') 
-                    if line.strip()
-                ])
+            prompts.extend(_PROMPT_LINE.findall(batch_prompts))
             
             # 处理文件输入的提示词
             if prompt_file:
-                file_prompts = prompt_parser.parse_prompt_file(prompt_file)
+                file_prompts = await asyncio.get_running_loop().run_in_executor(
+                    None, get_prompt_parser().parse_prompt_file, prompt_file
+                )
                 prompts.extend(file_prompts)
             
             if not prompts:
-                return {"error": "请输入提示词或上传提示词文件"}
+                yield _format_payload({"error": "请输入提示词或上传提示词文件"})
+                return
+            
+            # 去除重复提示词（保持原有顺序），重复项不再重复调用接口
+            unique_prompts = list(dict.fromkeys(prompts))
+            dedup_count = len(prompts) - len(unique_prompts)
+            
+            # 已有缓存结果的提示词将缓存的图像保存到输出目录，不再生成任务
+            model = get_api_client().model
+            cached_results: Dict[str, List[Dict[str, Any]]] = {}
+            prompts = []
+            for prompt in unique_prompts:
+                cached = result_cache.get(
+                    result_cache.make_key(p=prompt, s=size, n=1, m=model)
+                )
+                if cached is not None:
+                    cached_results[prompt] = cached["images"]
+                else:
+                    prompts.append(prompt)
+            
+            # 与任务执行相同的方式下载（同一URL已下载过时直接链接本地文件）；
+            # 缓存的URL已失效等原因未能保存的提示词仍然生成任务
+            cached_files: Dict[str, List[str]] = {}
+            if cached_results:
+                saved = await asyncio.gather(*(
+                    task_scheduler.executor.download_generated_images(images, output_dir, prompt)
+                    for prompt, images in cached_results.items()
+                ), return_exceptions=True)
+                for prompt, files in zip(cached_results, saved):
+                    if isinstance(files, list) and files:
+                        cached_files[prompt] = files
+                    else:
+                        prompts.append(prompt)
+            
+            stats = {
+                "dedup_count": dedup_count,
+                "cache_hit_count": len(cached_files),
+                "cached_files": cached_files
+            }
+            
+            if not prompts:
+                yield _format_payload({
+                    "success": True,
+                    "message": "所有提示词均已有缓存结果，无需生成",
+                    "task_count": 0,
+                    **stats
+                })
+                return
             
             # 生成任务
             tasks = task_generator.generate_text_to_image_tasks(
@@ -512,32 +711,65 @@ class SeedreamUI:
                 output_dir=output_dir,
                 parameters={"size": size}
             )
+            total = len(tasks)
             
-            # 添加到队列
-            task_queue.add_tasks(tasks)
+            # 调度器未运行时只添加到队列，由用户手动开始处理
+            if not task_scheduler.is_running:
+                task_queue.add_tasks(tasks)
+                yield _format_payload({
+                    "success": True,
+                    "message": f"已添加 {total} 个生成任务到队列",
+                    "task_count": total,
+                    **stats
+                })
+                return
             
-            return {
+            yield _format_payload({
                 "success": True,
-                "message": f"已添加 {len(tasks)} 个生成任务到队列",
-                "task_count": len(tasks)
-            }
+                "message": f"已添加 {total} 个生成任务到队列，正在处理",
+                "task_count": total,
+                "completed": 0,
+                "failed": 0,
+                **stats
+            })
+            
+            completed = failed = 0
+            async for task_result in task_scheduler.run_async(tasks):
+                if task_result["success"]:
+                    completed += 1
+                else:
+                    failed += 1
+                progress((completed + failed) / total, desc="批量生成中")
+                yield _format_payload({
+                    "success": True,
+                    "message": f"已处理 {completed + failed}/{total} 个任务",
+                    "task_count": total,
+                    "completed": completed,
+                    "failed": failed,
+                    **stats
+                })
             
         except Exception as e:
-            return {"error": str(e)}
+            yield _format_payload({"error": str(e)})
     
-    def _scan_image_directory(self, directory: str) -> Dict[str, Any]:
+    async def _scan_image_directory(self, directory: str) -> str:
         """扫描图像目录"""
         try:
             if not directory.strip():
-                return {"error": "请输入目录路径"}
+                return _format_payload({"error": "请输入目录路径"})
             
-            result = directory_scanner.scan_directory(directory)
-            return result
+            # 目录扫描涉及大量文件系统调用，放到线程池中执行，避免阻塞事件循环
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, get_directory_scanner().scan_directory, directory
+            )
+            # 逐文件明细可能非常大，界面只展示汇总信息
+            result.pop("files", None)
+            return _format_payload(result)
             
         except Exception as e:
-            return {"error": str(e)}
+            return _format_payload({"error": str(e)})
     
-    def _process_images(
+    async def _process_images(
         self,
         input_images: List[str],
         input_dir: str,
@@ -545,96 +777,151 @@ class SeedreamUI:
         mode: str,
         size: str,
         output_dir: str
-    ) -> Tuple[List[str], Dict[str, Any]]:
+    ) -> Tuple[List[str], str]:
         """处理图像"""
-        try:
-            if not prompt.strip():
-                return [], {"error": "请输入编辑指令"}
-            
-            # 收集输入文件
-            input_files = []
-            
-            if input_images:
-                input_files.extend(input_images)
-            
-            if input_dir.strip():
-                scan_result = directory_scanner.scan_directory(input_dir)
-                if "files" in scan_result:
-                    valid_files = [
-                        file_info["path"] 
-                        for file_info in scan_result["files"] 
-                        if file_info.get("valid", False)
-                    ]
-                    input_files.extend(valid_files)
+        # 先校验输入，无效时直接返回
+        if not prompt or not prompt.strip():
+            return [], _format_payload({"error": "请输入编辑指令"})
+        if mode not in ("edit", "generate"):
+            return [], _format_payload({"error": f"不支持的处理模式: {mode}"})
+        if not output_dir or not output_dir.strip():
+            return [], _format_payload({"error": "请输入输出目录"})
+        
+        # 收集输入文件
+        input_files = []
+        
+        if input_images:
+            input_files.extend(input_images)
+        
+        if input_dir and input_dir.strip():
+            try:
+                scan_result = await asyncio.get_running_loop().run_in_executor(
+                    None, get_directory_scanner().scan_directory, input_dir
+                )
+            except Exception as e:
+                return [], _format_payload({"error": f"扫描目录失败: {e}"})
             
-            if not input_files:
-                return [], {"error": "请选择输入图像"}
+            if "error" in scan_result:
+                return [], _format_payload({"error": f"扫描目录失败: {scan_result['error']}"})
             
-            # 生成任务
-            task_type = TaskType.IMAGE_TO_IMAGE
-            tasks = task_generator.generate_image_to_image_tasks(
-                input_files=input_files,
-                prompts=[prompt],
-                output_dir=output_dir,
-                parameters={"size": size, "mode": mode}
+            input_files.extend(
+                file_info["path"]
+                for file_info in scan_result["files"]
+                if file_info.get("valid", False)
             )
-            
-            # 添加到队列
-            task_queue.add_tasks(tasks)
-            
-            return [], {
-                "success": True,
-                "message": f"已添加 {len(tasks)} 个处理任务到队列",
-                "task_count": len(tasks)
-            }
-            
-        except Exception as e:
-            return [], {"error": str(e)}
+        
+        if not input_files:
+            return [], _format_payload({"error": "请选择输入图像"})
+        
+        # 生成任务
+        tasks = task_generator.generate_image_to_image_tasks(
+            input_files=input_files,
+            prompts=[prompt],
+            output_dir=output_dir,
+            parameters={"size": size, "mode": mode}
+        )
+        
+        # 添加到队列
+        task_queue.add_tasks(tasks)
+        
+        return [], _format_payload({
+            "success": True,
+            "message": f"已添加 {len(tasks)} 个处理任务到队列",
+            "task_count": len(tasks)
+        })
     
-    def _start_batch_processing(self) -> Dict[str, Any]:
+    def _start_batch_processing(self) -> str:
         """开始批处理"""
         try:
             task_scheduler.start()
-            return task_queue.get_queue_status()
+            return self._get_queue_status()
         except Exception as e:
-            return {"error": str(e)}
+            return f"启动失败: {e}"
     
-    def _pause_batch_processing(self) -> Dict[str, Any]:
+    def _pause_batch_processing(self) -> str:
         """暂停批处理"""
         try:
             task_scheduler.pause()
-            return task_queue.get_queue_status()
+            return self._get_queue_status()
         except Exception as e:
-            return {"error": str(e)}
+            return f"暂停失败: {e}"
     
-    def _stop_batch_processing(self) -> Dict[str, Any]:
+    def _stop_batch_processing(self) -> str:
         """停止批处理"""
         try:
             task_scheduler.stop()
-            return task_queue.get_queue_status()
+            return self._get_queue_status()
         except Exception as e:
-            return {"error": str(e)}
+            return f"停止失败: {e}"
     
-    def _get_queue_status(self) -> Dict[str, Any]:
-        """获取队列状态"""
-        return task_queue.get_queue_status()
+    def _get_queue_status(self) -> str:
+        """获取队列状态（Markdown格式）"""
+        status = task_queue.get_queue_status()
+        if task_scheduler.is_paused:
+            state = "已暂停"
+        elif task_scheduler.is_running:
+            state = "运行中"
+        else:
+            state = "未运行"
+        return (
+            f"**调度器**: {state}\n\n"
+            f"**等待中**: {status['pending']} | **执行中**: {status['running']} | "
+            f"**已完成**: {status['completed']} | **失败**: {status['failed']} | "
+            f"**总计**: {status['total']}"
+        )
     
-    def _get_task_list(self) -> List[List[str]]:
-        """获取任务列表"""
+    def _get_task_list(self, offset: int = 0, limit: int = 100) -> pd.DataFrame:
+        """获取任务列表（分页）"""
+        columns = ["ID", "类型", "状态", "提示词", "创建时间"]
         try:
-            tasks = []
-            for task in task_queue.tasks.values():
-                tasks.append([
-                    task.id[:8],  # 截短ID显示
-                    task.task_type.value,
-                    task.status.value,
-                    task.prompt[:50] + "..." if len(task.prompt) > 50 else task.prompt,
-                    task.created_at.strftime("%m-%d %H:%M:%S")
-                ])
-            return tasks
+            offset = max(int(offset or 0), 0)
+            limit = max(int(limit or 1), 1)
+            # 展示的字段只随任务增删和状态变化而变化，队列版本号未变时直接复用上次结果
+            # （先读版本号，保证缓存不会比数据新）
+            version = task_queue.version
+            cached = self._task_list_cache
+            if cached and cached[:3] == (version, offset, limit):
+                return cached[3]
+            
+            data = task_queue.get_task_columns(offset=offset, limit=limit)
+            frame = pd.DataFrame({
+                "ID": pd.Series(data["id"], dtype="object"),
+                "类型": data["task_type"],
+                "状态": data["status"],
+                "提示词": pd.Series(data["prompt"], dtype="object"),
+                "创建时间": pd.to_datetime(pd.Series(data["created_at"], dtype="object"))
+            }, columns=columns)
+            
+            # 整列截短ID和提示词、格式化时间，避免逐行处理
+            prompts = frame["提示词"]
+            frame = frame.assign(**{
+                "ID": frame["ID"].str[:8],
+                "提示词": prompts.where(prompts.str.len() <= 50, prompts.str[:50] + "..."),
+                "创建时间": frame["创建时间"].dt.strftime("%m-%d %H:%M:%S")
+            })
+            self._task_list_cache = (version, offset, limit, frame)
+            return frame
         except Exception as e:
-            return [["错误", str(e), "", "", ""]]
+            return pd.DataFrame([["错误", str(e), "", "", ""]], columns=columns)
+
+
+# 全局UI实例（首次使用时创建，导入模块时不注册回调）
+_seedream_ui_instance: Optional[SeedreamUI] = None
+_seedream_ui_lock = threading.Lock()
+
+
+def get_seedream_ui() -> SeedreamUI:
+    """获取全局UI实例"""
+    global _seedream_ui_instance
+    if _seedream_ui_instance is None:
+        with _seedream_ui_lock:
+            if _seedream_ui_instance is None:
+                _seedream_ui_instance = SeedreamUI()
+    return _seedream_ui_instance
 
 
-# 全局UI实例
-seedream_ui = SeedreamUI()
\ No newline at end of file
+def __getattr__(name: str) -> Any:
+    """兼容旧的 seedream_ui 模块属性访问"""
+    if name == "seedream_ui":
+        return get_seedream_ui()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
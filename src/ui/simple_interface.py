@@ -3,7 +3,7 @@
 """
 import gradio as gr
 import logging
-from ..api.client import api_client
+from ..api.client import get_api_client
 
 def create_simple_interface():
     """创建简化版界面"""
@@ -43,17 +43,22 @@ def create_simple_interface():
         # 事件绑定
         def save_api_key(api_key):
             if api_key.strip():
-                api_client.set_api_key(api_key.strip())
+                get_api_client().set_api_key(api_key.strip())
                 return "API密钥保存成功"
             return "请输入有效的API密钥"
         
-        def generate_image(prompt):
+        async def generate_image(prompt):
             if not prompt.strip():
                 return None, "请输入描述提示词"
             
             try:
-                # 这里暂时返回占位符
-                return None, f"正在生成图像: {prompt[:50]}..."
+                result = await get_api_client().async_text_to_image(prompt=prompt.strip())
+                if not result.get("success"):
+                    return None, f"生成失败: {result.get('error', '未知错误')}"
+                images = result.get("images") or []
+                if not images:
+                    return None, "生成失败: 未返回图像"
+                return images[0]["url"], f"生成完成: {prompt[:50]}"
             except Exception as e:
                 return None, f"生成失败: {str(e)}"
         
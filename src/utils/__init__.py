@@ -1,11 +1,25 @@
 """
 工具模块初始化文件
 """
+from typing import Any
+
 from .config import ConfigManager, config_manager
-from .file_handler import FileProcessor, DirectoryScanner, PromptParser, file_processor, directory_scanner, prompt_parser
+from .file_handler import (
+    FileProcessor, DirectoryScanner, PromptParser,
+    get_file_processor, get_directory_scanner, get_prompt_parser
+)
 
 __all__ = [
     'ConfigManager', 'config_manager',
     'FileProcessor', 'DirectoryScanner', 'PromptParser',
+    'get_file_processor', 'get_directory_scanner', 'get_prompt_parser',
     'file_processor', 'directory_scanner', 'prompt_parser'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str) -> Any:
+    """按需创建全局文件处理实例，导入本模块时不实例化"""
+    if name in ('file_processor', 'directory_scanner', 'prompt_parser'):
+        from . import file_handler
+        return getattr(file_handler, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,12 +3,28 @@
 负责处理应用程序的配置，包括API密钥管理、用户设置等
 """
 import os
+import re
 import json
 import yaml
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, Iterator
 from dotenv import load_dotenv
 
+# 优先使用libyaml的C实现解析和输出YAML，未编译libyaml时回退到纯Python实现
+try:
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
+# get() 缓存中的哨兵值：未缓存 / 配置中不存在该键
+_MISSING = object()
+_NOT_FOUND = object()
+
+# .env 文件中的API密钥行
+_ENV_API_KEY_LINE = re.compile(r'^ARK_API_KEY=.*$', re.MULTILINE)
+
 
 class ConfigManager:
     """配置管理器"""
@@ -31,6 +47,16 @@ class ConfigManager:
         # 加载环境变量
         load_dotenv(self.env_file)
         
+        # 内存中的配置有尚未写入文件的修改
+        self._dirty = False
+        # set() 后是否立即保存（批量更新期间关闭）
+        self._autosave = True
+        # 已加载的 (默认配置, 用户配置) 文件修改时间，文件未变化时不重新解析
+        self._loaded_mtimes: Optional[Tuple[Optional[int], Optional[int]]] = None
+        # get() 的查询结果缓存（配置变化时清空），以及键路径的拆分结果
+        self._get_cache: Dict[str, Any] = {}
+        self._path_cache: Dict[str, Tuple[str, ...]] = {}
+        
         # 初始化配置
         self._init_default_config()
         self._load_config()
@@ -42,13 +68,17 @@ class ConfigManager:
                 "base_url": "https://ark.cn-beijing.volces.com/api/v3",
                 "model": "doubao-seedream-4-0-250828",
                 "timeout": 30,
-                "max_retries": 3
+                "max_retries": 3,
+                "max_concurrency": 8,
+                "prevalidate_urls": False
             },
             "batch": {
                 "max_concurrent_tasks": 5,
                 "batch_size": 10,
                 "auto_retry": True,
-                "retry_delay": 5
+                "retry_delay": 5,
+                "queue_journal": "",
+                "shutdown_timeout": 30
             },
             "image": {
                 "supported_formats": [".jpg", ".jpeg", ".png", ".bmp", ".tiff"],
@@ -62,45 +92,81 @@ class ConfigManager:
                 "logs_dir": "logs",
                 "cache_dir": "cache"
             },
+            "cache": {
+                "b64_max_bytes": 64 * 1024 * 1024,
+                "result_ttl": 82800,
+                "url_entries": 1024
+            },
+            "download": {
+                "max_concurrent": 8
+            },
             "ui": {
                 "theme": "default",
                 "share": False,
                 "port": 7860,
-                "height": 600
+                "height": 600,
+                "status_refresh_interval": 2.0,
+                "task_page_size": 100
             },
             "logging": {
                 "level": "INFO",
                 "file_enabled": True,
                 "console_enabled": True,
-                "max_file_size_mb": 10
+                "max_file_size_mb": 10,
+                "buffer_capacity": 512
             }
         }
         
         # 写入默认配置文件
         if not self.default_config_file.exists():
             with open(self.default_config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(default_config, f, default_flow_style=False, allow_unicode=True)
+                yaml.dump(default_config, f, Dumper=_Dumper, default_flow_style=False, allow_unicode=True)
+    
+    @staticmethod
+    def _get_mtime(file_path: Path) -> Optional[int]:
+        """获取文件修改时间（纳秒），文件不存在时返回None"""
+        try:
+            return file_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
     
     def _load_config(self) -> None:
-        """加载配置"""
+        """加载配置（配置文件自上次加载后未变化时跳过）"""
+        mtimes = (self._get_mtime(self.default_config_file), self._get_mtime(self.config_file))
+        if mtimes == self._loaded_mtimes:
+            return
+        
         # 首先加载默认配置
         with open(self.default_config_file, 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+            self.config = yaml.load(f, Loader=_Loader)
         
         # 如果存在用户配置文件，则覆盖默认配置
-        if self.config_file.exists():
+        if mtimes[1] is not None:
             with open(self.config_file, 'r', encoding='utf-8') as f:
-                user_config = yaml.safe_load(f)
+                user_config = yaml.load(f, Loader=_Loader)
                 if user_config:
                     self._deep_update(self.config, user_config)
+        
+        self._get_cache.clear()
+        self._loaded_mtimes = mtimes
+        self._dirty = False
+    
+    def reload(self) -> None:
+        """重新加载配置文件（文件未变化时不重新解析）"""
+        self._load_config()
     
     def _deep_update(self, base_dict: Dict, update_dict: Dict) -> None:
         """深度更新字典"""
-        for key, value in update_dict.items():
-            if key in base_dict and isinstance(base_dict[key], dict) and isinstance(value, dict):
-                self._deep_update(base_dict[key], value)
-            else:
-                base_dict[key] = value
+        # 使用显式栈代替递归，嵌套层级再深也不会超出递归限制
+        stack = [(base_dict, update_dict)]
+        while stack:
+            base, update = stack.pop()
+            for key, value in update.items():
+                base_value = base.get(key)
+                if isinstance(base_value, dict) and isinstance(value, dict):
+                    stack.append((base_value, value))
+                else:
+                    base[key] = value
     
     def get(self, key_path: str, default: Any = None) -> Any:
         """
@@ -113,15 +179,21 @@ class ConfigManager:
         Returns:
             配置值
         """
-        keys = key_path.split('.')
-        value = self.config
+        value = self._get_cache.get(key_path, _MISSING)
+        if value is _MISSING:
+            keys = self._path_cache.get(key_path)
+            if keys is None:
+                keys = self._path_cache[key_path] = tuple(key_path.split('.'))
+            
+            value = self.config
+            try:
+                for key in keys:
+                    value = value[key]
+            except (KeyError, TypeError):
+                value = _NOT_FOUND
+            self._get_cache[key_path] = value
         
-        try:
-            for key in keys:
-                value = value[key]
-            return value
-        except (KeyError, TypeError):
-            return default
+        return default if value is _NOT_FOUND else value
     
     def set(self, key_path: str, value: Any) -> None:
         """
@@ -133,6 +205,8 @@ class ConfigManager:
         """
         keys = key_path.split('.')
         config = self.config
+        # 修改可能影响任意前缀或子路径的查询结果
+        self._get_cache.clear()
         
         # 导航到最后一级
         for key in keys[:-1]:
@@ -142,14 +216,45 @@ class ConfigManager:
         
         # 设置值
         config[keys[-1]] = value
+        self._dirty = True
         
-        # 保存配置
-        self.save_config()
+        # 批量更新期间推迟保存，退出时统一写入一次
+        if self._autosave:
+            self.save_config()
+    
+    @contextmanager
+    def batch_update(self) -> Iterator[None]:
+        """
+        批量更新配置，期间的多次 set() 只在退出时保存一次
+        
+        用法:
+            with config_manager.batch_update():
+                config_manager.set("api.timeout", 60)
+                config_manager.set("api.max_retries", 5)
+        """
+        previous = self._autosave
+        self._autosave = False
+        try:
+            yield
+        finally:
+            self._autosave = previous
+            # 嵌套使用时由最外层负责保存
+            if previous:
+                self.flush()
+    
+    def flush(self) -> None:
+        """将尚未保存的修改写入用户配置文件"""
+        if self._dirty:
+            self.save_config()
     
     def save_config(self) -> None:
         """保存用户配置"""
         with open(self.config_file, 'w', encoding='utf-8') as f:
-            yaml.dump(self.config, f, default_flow_style=False, allow_unicode=True)
+            yaml.dump(self.config, f, Dumper=_Dumper, default_flow_style=False, allow_unicode=True)
+        
+        self._dirty = False
+        # 内存中的配置与刚写入的文件一致，重新加载时无需解析
+        self._loaded_mtimes = (self._get_mtime(self.default_config_file), self._get_mtime(self.config_file))
     
     def get_api_key(self) -> Optional[str]:
         """
@@ -181,21 +286,29 @@ class ConfigManager:
                 with open(self.env_file, 'r', encoding='utf-8') as f:
                     env_content = f.read()
             
-            # 检查是否已存在ARK_API_KEY
-            lines = env_content.split('\n')
-            updated = False
-            for i, line in enumerate(lines):
-                if line.startswith('ARK_API_KEY='):
-                    lines[i] = f'ARK_API_KEY={api_key}'
-                    updated = True
-                    break
-            
-            if not updated:
-                lines.append(f'ARK_API_KEY={api_key}')
+            # 替换已有的ARK_API_KEY，不存在时追加
+            new_line = f'ARK_API_KEY={api_key}'
+            env_content, count = _ENV_API_KEY_LINE.subn(
+                lambda _: new_line, env_content, count=1
+            )
+            if count == 0:
+                if env_content and not env_content.endswith('\n'):
+                    env_content += '\n'
+                env_content += new_line
             
-            # 写回文件
-            with open(self.env_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(lines))
+            # 先写临时文件再原子替换，写入中断时不会损坏原文件
+            self.env_file.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=self.env_file.parent,
+                prefix='.env.', suffix='.tmp', delete=False
+            ) as f:
+                f.write(env_content)
+                tmp_path = f.name
+            try:
+                os.replace(tmp_path, self.env_file)
+            except OSError:
+                os.unlink(tmp_path)
+                raise
             
             # 更新当前环境变量
             os.environ['ARK_API_KEY'] = api_key
@@ -254,7 +367,7 @@ class ConfigManager:
             safe_config["api"]["api_key"] = "***HIDDEN***"
         
         with open(file_path, 'w', encoding='utf-8') as f:
-            yaml.dump(safe_config, f, default_flow_style=False, allow_unicode=True)
+            yaml.dump(safe_config, f, Dumper=_Dumper, default_flow_style=False, allow_unicode=True)
     
     def import_config(self, file_path: str) -> None:
         """
@@ -264,9 +377,10 @@ class ConfigManager:
             file_path: 配置文件路径
         """
         with open(file_path, 'r', encoding='utf-8') as f:
-            imported_config = yaml.safe_load(f)
+            imported_config = yaml.load(f, Loader=_Loader)
             if imported_config:
                 self._deep_update(self.config, imported_config)
+                self._get_cache.clear()
                 self.save_config()
 
 
@@ -3,20 +3,149 @@
 负责图像文件的读取、编码、下载、命名等操作
 """
 import os
+import csv
 import base64
+import functools
 import hashlib
 import logging
 import requests
+import shutil
+import tempfile
+import threading
 import uuid
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Union, Tuple
+from typing import List, Dict, Any, Optional, Union, Tuple, Iterator, Collection
 from urllib.parse import urlparse
 from PIL import Image, ImageOps
 import io
 
 from ..utils.config import config_manager
 
+# base64分块编码的读取大小：3的倍数，各块编码结果可直接拼接
+_B64_CHUNK_SIZE = 3 * 64 * 1024
+
+# 下载时接受的Content-Type前缀（对象存储常以octet-stream返回图像）
+_DOWNLOAD_CONTENT_TYPES = ('image/', 'application/octet-stream', 'binary/octet-stream')
+
+# 缩放倍数达到该值时改用BILINEAR重采样
+_BILINEAR_SCALE_THRESHOLD = 4
+
+# 提示词文件中的注释行前缀
+_PROMPT_COMMENT_PREFIXES = ('#',)
+
+
+@functools.lru_cache(maxsize=8192)
+def _read_image_header(path: str, mtime_ns: int, size: int) -> Tuple[Dict[str, Any], str]:
+    """
+    读取图像头信息并校验文件（按路径、修改时间和大小缓存，文件变化后自动失效）
+    
+    Args:
+        path: 文件路径
+        mtime_ns: 文件修改时间（纳秒），仅作为缓存键
+        size: 文件大小（字节），仅作为缓存键
+        
+    Returns:
+        (图像属性字典, 校验错误信息)；返回的字典被缓存共享，调用方不可修改
+        
+    Raises:
+        Exception: 文件无法作为图像打开时抛出（异常不会被缓存）
+    """
+    with Image.open(path) as img:
+        # 尺寸、格式等在打开时已从文件头解析，需在verify()之前读取
+        attributes = {
+            "width": img.width,
+            "height": img.height,
+            "format": img.format,
+            "mode": img.mode,
+            "has_transparency": img.mode in ("RGBA", "LA") or "transparency" in img.info
+        }
+        try:
+            img.verify()
+            verify_error = ""
+        except Exception as e:
+            verify_error = str(e)
+    return attributes, verify_error
+
+
+def link_or_copy(source: Union[str, Path], target: Union[str, Path]) -> bool:
+    """
+    将已有文件硬链接到目标路径，不支持硬链接时复制文件
+    
+    Args:
+        source: 源文件路径
+        target: 目标文件路径
+        
+    Returns:
+        是否成功；源文件已不存在时返回False
+    """
+    # 先链接到同目录下的临时名称再原子替换，目标已存在（如占位文件）时也能使用硬链接
+    target = os.fspath(target)
+    tmp_target = f"{target}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(source, tmp_target)
+        os.replace(tmp_target, target)
+    except OSError:
+        try:
+            os.unlink(tmp_target)
+        except OSError:
+            pass
+        try:
+            shutil.copy2(source, target)
+        except OSError:
+            return False
+    return True
+
+
+def verify_image_file(
+    file_path: Union[str, Path],
+    supported_formats: Collection[str],
+    max_size_mb: float
+) -> Tuple[bool, str]:
+    """
+    验证图像文件（不依赖实例状态，可在子进程中执行）
+    
+    Args:
+        file_path: 文件路径
+        supported_formats: 支持的文件扩展名集合（小写）
+        max_size_mb: 最大文件大小（MB）
+        
+    Returns:
+        (是否有效, 错误信息)
+    """
+    try:
+        path_str = os.fspath(file_path)
+        
+        # 检查文件是否存在（同时取得文件大小，只stat一次）
+        try:
+            file_size = os.stat(path_str).st_size
+        except FileNotFoundError:
+            return False, f"文件不存在: {path_str}"
+        
+        # 检查文件扩展名
+        suffix = os.path.splitext(path_str)[1]
+        if suffix.lower() not in supported_formats:
+            return False, f"不支持的文件格式: {suffix}"
+        
+        # 检查文件大小
+        file_size_mb = file_size / (1024 * 1024)
+        if file_size_mb > max_size_mb:
+            return False, f"文件过大: {file_size_mb:.2f}MB > {max_size_mb}MB"
+        
+        # 尝试打开图像文件
+        try:
+            with Image.open(path_str) as img:
+                img.verify()
+            return True, ""
+        except Exception as e:
+            return False, f"无效的图像文件: {e}"
+            
+    except Exception as e:
+        return False, f"文件验证失败: {e}"
+
 
 class FileProcessor:
     """文件处理器"""
@@ -26,13 +155,35 @@ class FileProcessor:
         self.config = config_manager
         self.logger = logging.getLogger(__name__)
         
-        # 支持的图像格式
-        self.supported_formats = self.config.get("image.supported_formats", [
-            ".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"
-        ])
+        # 支持的图像格式（小写扩展名集合，目录扫描时O(1)判断）
+        self.supported_formats = frozenset(
+            ext.lower() for ext in self.config.get("image.supported_formats", [
+                ".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"
+            ])
+        )
         
         # 最大文件大小（MB）
         self.max_size_mb = self.config.get("image.max_size_mb", 10)
+        
+        # 图像下载共用的会话，同一CDN的连接在各次下载间保持复用
+        download_concurrency = self.config.get("download.max_concurrent", 8)
+        self._http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=download_concurrency,
+            pool_maxsize=download_concurrency,
+            max_retries=0
+        )
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        
+        # 已下载URL到本地文件的LRU记录，重复URL直接链接本地文件而不再请求网络
+        self._url_cache: "OrderedDict[str, Path]" = OrderedDict()
+        self._url_cache_size = self.config.get("cache.url_entries", 1024)
+        self._url_cache_lock = threading.Lock()
+    
+    def close(self) -> None:
+        """释放HTTP会话"""
+        self._http.close()
     
     def validate_image_file(self, file_path: Union[str, Path]) -> Tuple[bool, str]:
         """
@@ -44,55 +195,102 @@ class FileProcessor:
         Returns:
             (是否有效, 错误信息)
         """
-        try:
-            file_path = Path(file_path)
-            
-            # 检查文件是否存在
-            if not file_path.exists():
-                return False, f"文件不存在: {file_path}"
-            
-            # 检查文件扩展名
-            if file_path.suffix.lower() not in self.supported_formats:
-                return False, f"不支持的文件格式: {file_path.suffix}"
-            
-            # 检查文件大小
-            file_size_mb = file_path.stat().st_size / (1024 * 1024)
-            if file_size_mb > self.max_size_mb:
-                return False, f"文件过大: {file_size_mb:.2f}MB > {self.max_size_mb}MB"
+        return verify_image_file(file_path, self.supported_formats, self.max_size_mb)
+    
+    def validate_and_describe(
+        self,
+        file_path: Union[str, Path],
+        stat_result: Optional[os.stat_result] = None
+    ) -> Tuple[bool, str, Dict[str, Any]]:
+        """
+        验证图像文件并获取图像信息（只打开一次文件）
+        
+        Args:
+            file_path: 文件路径
+            stat_result: 调用方已获取的文件状态，避免重复stat
             
-            # 尝试打开图像文件
-            try:
-                with Image.open(file_path) as img:
-                    img.verify()
-                return True, ""
-            except Exception as e:
-                return False, f"无效的图像文件: {e}"
-                
+        Returns:
+            (是否有效, 错误信息, 图像信息字典)
+        """
+        # 目录扫描时逐个文件调用，全程使用字符串路径，不构造Path对象
+        path_str = os.fspath(file_path)
+        
+        try:
+            stat = stat_result if stat_result is not None else os.stat(path_str)
+        except FileNotFoundError:
+            return False, f"文件不存在: {path_str}", {}
+        except OSError as e:
+            return False, f"文件验证失败: {e}", {}
+        
+        # 先用扩展名和文件大小过滤，不满足时无需打开文件
+        suffix = os.path.splitext(path_str)[1]
+        if suffix.lower() not in self.supported_formats:
+            return False, f"不支持的文件格式: {suffix}", {}
+        
+        size_mb = stat.st_size / (1024 * 1024)
+        if size_mb > self.max_size_mb:
+            return False, f"文件过大: {size_mb:.2f}MB > {self.max_size_mb}MB", {}
+        
+        try:
+            attributes, verify_error = _read_image_header(
+                path_str, stat.st_mtime_ns, stat.st_size
+            )
         except Exception as e:
-            return False, f"文件验证失败: {e}"
+            return False, f"无效的图像文件: {e}", {}
+        
+        if verify_error:
+            return False, f"无效的图像文件: {verify_error}", {}
+        
+        info = {
+            "path": path_str,
+            "name": os.path.basename(path_str),
+            "size_bytes": stat.st_size,
+            "size_mb": size_mb,
+            "created": datetime.fromtimestamp(stat.st_ctime),
+            "modified": datetime.fromtimestamp(stat.st_mtime),
+        }
+        info.update(attributes)
+        return True, "", info
     
-    def encode_image_to_base64(self, file_path: Union[str, Path]) -> Optional[str]:
+    def encode_image_to_base64(
+        self,
+        file_path: Union[str, Path],
+        validate: bool = True
+    ) -> Optional[str]:
         """
         将图像文件编码为base64字符串
         
         Args:
             file_path: 图像文件路径
+            validate: 是否先验证图像文件（调用方已验证时可跳过）
             
         Returns:
             base64编码的字符串，失败时返回None
         """
         try:
-            is_valid, error_msg = self.validate_image_file(file_path)
-            if not is_valid:
-                self.logger.error(f"图像验证失败: {error_msg}")
-                return None
+            if validate:
+                is_valid, error_msg = self.validate_image_file(file_path)
+                if not is_valid:
+                    self.logger.error(f"图像验证失败: {error_msg}")
+                    return None
             
             with open(file_path, 'rb') as image_file:
-                image_data = image_file.read()
-                base64_string = base64.b64encode(image_data).decode('utf-8')
-                
-                self.logger.debug(f"图像编码成功: {file_path}")
-                return base64_string
+                # 预分配编码结果缓冲区，分块读取编码，不保留整个文件内容的副本
+                file_size = os.fstat(image_file.fileno()).st_size
+                encoded = bytearray(4 * ((file_size + 2) // 3))
+                offset = 0
+                while True:
+                    chunk = image_file.read(_B64_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    piece = base64.b64encode(chunk)
+                    encoded[offset:offset + len(piece)] = piece
+                    offset += len(piece)
+                del encoded[offset:]
+            
+            base64_string = encoded.decode('ascii')
+            self.logger.debug("图像编码成功: %s", file_path)
+            return base64_string
                 
         except Exception as e:
             self.logger.error(f"图像编码失败: {file_path}, 错误: {e}")
@@ -140,7 +338,9 @@ class FileProcessor:
         self,
         url: str,
         output_path: Union[str, Path],
-        timeout: int = 30
+        timeout: int = 30,
+        create_parent: bool = True,
+        validate: bool = True
     ) -> bool:
         """
         从URL下载图像
@@ -149,37 +349,131 @@ class FileProcessor:
             url: 图像URL
             output_path: 输出文件路径
             timeout: 超时时间（秒）
+            create_parent: 是否创建输出目录（调用方已确保目录存在时可跳过）
+            validate: 是否验证下载的文件（调用方自行验证时可跳过）
             
         Returns:
             是否成功
         """
+        if self.reuse_download(url, output_path, create_parent):
+            self.logger.info("图像已下载过，复用本地文件: %s -> %s", url, output_path)
+            return True
+        
+        tmp_path = None
         try:
-            # 发送请求下载图像
-            response = requests.get(url, timeout=timeout, stream=True)
-            response.raise_for_status()
-            
-            # 确保输出目录存在
-            output_path = Path(output_path)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # 保存文件
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # 发送请求下载图像（响应关闭后连接归还连接池）
+            with self._http.get(url, timeout=timeout, stream=True) as response:
+                response.raise_for_status()
+                
+                # 下载前根据响应头检查，明显无效的响应不读取响应体
+                max_bytes = self.max_size_mb * 1024 * 1024
+                content_type = response.headers.get("Content-Type", "")
+                if content_type and not content_type.lower().startswith(_DOWNLOAD_CONTENT_TYPES):
+                    self.logger.error(f"下载的内容不是图像: {url}, Content-Type: {content_type}")
+                    return False
+                
+                content_length = response.headers.get("Content-Length")
+                if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+                    self.logger.error(
+                        f"下载的文件过大: {url}, {int(content_length) / (1024 * 1024):.2f}MB > {self.max_size_mb}MB"
+                    )
+                    return False
+                
+                # 确保输出目录存在
+                output_path = Path(output_path)
+                if create_parent:
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
+                
+                # 先写入同目录下的临时文件（保留扩展名以便验证），验证通过后再原子替换
+                # 64KB分块读取，128KB写缓冲，减少系统调用次数
+                received = 0
+                with tempfile.NamedTemporaryFile(
+                    'wb', buffering=128 * 1024, dir=output_path.parent,
+                    prefix=f".{output_path.stem}.", suffix=output_path.suffix, delete=False
+                ) as f:
+                    tmp_path = f.name
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        received += len(chunk)
+                        if received > max_bytes:
+                            self.logger.error(f"下载的文件过大: {url}, 超过 {self.max_size_mb}MB")
+                            return False
+                        f.write(chunk)
             
             # 验证下载的文件
-            is_valid, error_msg = self.validate_image_file(output_path)
-            if not is_valid:
-                output_path.unlink(missing_ok=True)  # 删除无效文件
-                self.logger.error(f"下载的文件无效: {error_msg}")
-                return False
-            
-            self.logger.info(f"图像下载成功: {url} -> {output_path}")
+            if validate:
+                is_valid, error_msg = self.validate_image_file(tmp_path)
+                if not is_valid:
+                    self.logger.error(f"下载的文件无效: {error_msg}")
+                    return False
+            
+            os.replace(tmp_path, output_path)
+            tmp_path = None
+            # 只记录已验证的文件；未验证时由调用方验证通过后调用 remember_download
+            if validate:
+                self.remember_download(url, output_path)
+            
+            self.logger.info("图像下载成功: %s -> %s", url, output_path)
             return True
             
         except Exception as e:
             self.logger.error(f"图像下载失败: {url}, 错误: {e}")
             return False
+        
+        finally:
+            # 下载失败或验证未通过时删除临时文件
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+    
+    def reuse_download(
+        self,
+        url: str,
+        output_path: Union[str, Path],
+        create_parent: bool = True
+    ) -> bool:
+        """
+        URL已下载过且本地文件仍在时，将其链接或复制到输出路径
+        
+        Args:
+            url: 图像URL
+            output_path: 输出文件路径
+            create_parent: 是否创建输出目录
+            
+        Returns:
+            是否已复用本地文件
+        """
+        with self._url_cache_lock:
+            source = self._url_cache.get(url)
+            if source is not None:
+                self._url_cache.move_to_end(url)
+        if source is None:
+            return False
+        
+        output_path = Path(output_path)
+        if output_path == source:
+            return source.exists()
+        
+        if create_parent:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+        if link_or_copy(source, output_path):
+            return True
+        
+        # 源文件已被删除，丢弃记录后重新下载
+        with self._url_cache_lock:
+            if self._url_cache.get(url) == source:
+                del self._url_cache[url]
+        return False
+    
+    def remember_download(self, url: str, file_path: Union[str, Path]) -> None:
+        """记录已下载并验证通过的URL，超出容量时淘汰最久未使用的记录"""
+        file_path = Path(file_path)
+        with self._url_cache_lock:
+            self._url_cache[url] = file_path
+            self._url_cache.move_to_end(url)
+            while len(self._url_cache) > self._url_cache_size:
+                self._url_cache.popitem(last=False)
     
     def generate_filename(
         self,
@@ -238,18 +532,22 @@ class FileProcessor:
         Returns:
             唯一的文件名
         """
-        output_dir = Path(output_dir)
-        base_path = output_dir / f"{base_name}{extension}"
+        # 一次列出目录内容，之后在内存中探测，避免每个候选名都stat一次
+        try:
+            with os.scandir(output_dir) as entries:
+                existing = {entry.name for entry in entries}
+        except FileNotFoundError:
+            existing = set()
         
-        if not base_path.exists():
-            return base_path.name
+        base_filename = f"{base_name}{extension}"
+        if base_filename not in existing:
+            return base_filename
         
         # 如果文件已存在，添加数字后缀
         counter = 1
         while True:
             new_name = f"{base_name}_{counter}{extension}"
-            new_path = output_dir / new_name
-            if not new_path.exists():
+            if new_name not in existing:
                 return new_name
             counter += 1
     
@@ -264,32 +562,29 @@ class FileProcessor:
             图像信息字典
         """
         try:
-            file_path = Path(file_path)
+            path_str = os.fspath(file_path)
             
-            if not file_path.exists():
+            try:
+                stat = os.stat(path_str)
+            except FileNotFoundError:
                 return {"error": "文件不存在"}
             
             # 基本文件信息
-            stat = file_path.stat()
             file_info = {
-                "path": str(file_path),
-                "name": file_path.name,
+                "path": path_str,
+                "name": os.path.basename(path_str),
                 "size_bytes": stat.st_size,
                 "size_mb": stat.st_size / (1024 * 1024),
                 "created": datetime.fromtimestamp(stat.st_ctime),
                 "modified": datetime.fromtimestamp(stat.st_mtime),
             }
             
-            # 图像信息
+            # 图像信息（文件未变化时直接使用缓存，不再打开文件）
             try:
-                with Image.open(file_path) as img:
-                    file_info.update({
-                        "width": img.width,
-                        "height": img.height,
-                        "format": img.format,
-                        "mode": img.mode,
-                        "has_transparency": img.mode in ("RGBA", "LA") or "transparency" in img.info
-                    })
+                attributes, _ = _read_image_header(
+                    path_str, stat.st_mtime_ns, stat.st_size
+                )
+                file_info.update(attributes)
             except Exception as e:
                 file_info["image_error"] = str(e)
             
@@ -321,8 +616,19 @@ class FileProcessor:
         """
         try:
             with Image.open(input_path) as img:
+                # 缩小倍数较大时LANCZOS与BILINEAR效果无明显差别，但计算量约为三倍
+                scale = max(img.width / max_width, img.height / max_height)
+                resample = (
+                    Image.Resampling.BILINEAR if scale >= _BILINEAR_SCALE_THRESHOLD
+                    else Image.Resampling.LANCZOS
+                )
+                
+                # JPEG在DCT域按1/2~1/8比例直接解码，不必先解码全尺寸图像
+                if img.format == "JPEG" and scale > 1:
+                    img.draft(img.mode, (max_width * 2, max_height * 2))
+                
                 # 计算新尺寸
-                img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+                img.thumbnail((max_width, max_height), resample)
                 
                 # 确保输出目录存在
                 output_path = Path(output_path)
@@ -391,44 +697,76 @@ class DirectoryScanner:
             if include_subdirs:
                 result["subdirectories"] = []
             
-            # 获取文件列表
-            if recursive:
-                pattern = "**/*"
-            else:
-                pattern = "*"
-            
-            for item in directory.glob(pattern):
-                if item.is_file():
-                    result["total_files"] += 1
-                    
-                    # 检查是否为支持的图像格式
-                    if item.suffix.lower() in self.file_processor.supported_formats:
-                        is_valid, error_msg = self.file_processor.validate_image_file(item)
-                        
-                        file_info = {
-                            "path": str(item),
-                            "relative_path": str(item.relative_to(directory)),
-                            "name": item.name,
-                            "valid": is_valid
-                        }
-                        
-                        if is_valid:
-                            result["valid_images"] += 1
-                            # 获取详细图像信息
-                            image_info = self.file_processor.get_image_info(item)
-                            file_info.update(image_info)
-                        else:
-                            result["invalid_files"] += 1
-                            file_info["error"] = error_msg
-                            result["errors"].append(f"{item}: {error_msg}")
+            supported_formats = self.file_processor.supported_formats
+            # 相对路径直接从条目路径中截取，不逐个构造Path
+            prefix_len = len(os.path.join(str(directory), ""))
+            # 待验证的图像文件: (路径, 文件名, stat结果)
+            candidates = []
+            total_files = 0
+            
+            # 使用os.scandir遍历：目录条目自带文件类型，无需逐个stat
+            # 按目录条目顺序先序遍历（与 Path.glob("**/*") 的结果顺序一致），不进入符号链接目录
+            pending_dirs = [str(directory)]
+            while pending_dirs:
+                current_dir = pending_dirs.pop()
+                subdirs = []
+                try:
+                    entries = os.scandir(current_dir)
+                except OSError as e:
+                    # 无权限等无法读取的子目录记录错误后跳过，不中断整个扫描
+                    result["errors"].append(f"{current_dir}: {e}")
+                    continue
+                
+                with entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            total_files += 1
+                            
+                            # 先按扩展名过滤，只为支持的图像格式打开文件
+                            if os.path.splitext(entry.name)[1].lower() not in supported_formats:
+                                continue
+                            
+                            candidates.append((entry.path, entry.name, entry.stat()))
                         
-                        result["files"].append(file_info)
+                        elif entry.is_dir():
+                            if recursive:
+                                if not entry.is_symlink():
+                                    subdirs.append(entry.path)
+                            elif include_subdirs:
+                                result["subdirectories"].append({
+                                    "path": entry.path,
+                                    "name": entry.name
+                                })
+                
+                # 逆序入栈，使子目录按条目顺序依次出栈
+                pending_dirs.extend(reversed(subdirs))
+            
+            files = result["files"]
+            errors = result["errors"]
+            valid_images = 0
+            for (path, name, _), (is_valid, error_msg, image_info) in zip(
+                candidates, self._validate_candidates(candidates)
+            ):
+                file_info = {
+                    "path": path,
+                    "relative_path": path[prefix_len:],
+                    "name": name,
+                    "valid": is_valid
+                }
                 
-                elif include_subdirs and item.is_dir() and not recursive:
-                    result["subdirectories"].append({
-                        "path": str(item),
-                        "name": item.name
-                    })
+                if is_valid:
+                    valid_images += 1
+                    file_info.update(image_info)
+                else:
+                    file_info["error"] = error_msg
+                    errors.append(f"{path}: {error_msg}")
+                
+                files.append(file_info)
+            
+            # 计数在遍历结束后一次写入，循环中不反复更新结果字典
+            result["total_files"] = total_files
+            result["valid_images"] = valid_images
+            result["invalid_files"] = len(candidates) - valid_images
             
             self.logger.info(f"目录扫描完成: {directory}, 找到 {result['valid_images']} 个有效图像文件")
             return result
@@ -438,6 +776,52 @@ class DirectoryScanner:
             self.logger.error(error_msg)
             return {"error": error_msg}
     
+    def _validate_candidates(
+        self,
+        candidates: List[Tuple[str, str, os.stat_result]]
+    ) -> List[Tuple[bool, str, Dict[str, Any]]]:
+        """
+        并行验证候选图像文件
+        
+        Args:
+            candidates: (路径, 文件名, stat结果) 列表
+            
+        Returns:
+            与candidates顺序一致的 (是否有效, 错误信息, 图像信息) 列表
+        """
+        def _validate(candidate):
+            path, _, stat_result = candidate
+            # 验证和获取图像信息合并为一次打开，并复用条目的stat结果
+            return self.file_processor.validate_and_describe(path, stat_result)
+        
+        # 超过大小限制的文件无需打开，直接在当前线程得出结果，只把需要解析的文件交给线程池
+        max_bytes = self.file_processor.max_size_mb * 1024 * 1024
+        results = [None] * len(candidates)
+        to_open = []
+        for i, candidate in enumerate(candidates):
+            if candidate[2].st_size > max_bytes:
+                results[i] = _validate(candidate)
+            else:
+                to_open.append(i)
+        
+        # 图像头解析主要耗时在磁盘I/O和Pillow的C代码中（释放GIL），多线程可以并行
+        max_workers = min(
+            32,
+            (os.cpu_count() or 1) * 4,
+            max(1, self.config.get("batch.max_concurrent_tasks", 5)),
+            len(to_open)
+        )
+        selected = [candidates[i] for i in to_open]
+        if max_workers <= 1:
+            validated = [_validate(candidate) for candidate in selected]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scan") as executor:
+                validated = list(executor.map(_validate, selected))
+        
+        for i, outcome in zip(to_open, validated):
+            results[i] = outcome
+        return results
+    
     def get_directory_structure(self, directory: Union[str, Path], max_depth: int = 3) -> Dict[str, Any]:
         """
         获取目录结构
@@ -451,37 +835,49 @@ class DirectoryScanner:
         """
         try:
             directory = Path(directory)
+            supported_formats = self.file_processor.supported_formats
             
-            def _scan_recursive(path: Path, current_depth: int = 0) -> Dict[str, Any]:
-                """递归扫描目录"""
-                if current_depth > max_depth:
-                    return {"truncated": True}
-                
-                node = {
-                    "name": path.name,
-                    "path": str(path),
-                    "type": "directory",
-                    "children": []
-                }
+            root = {
+                "name": directory.name,
+                "path": str(directory),
+                "type": "directory",
+                "children": []
+            }
+            
+            # 按层广度优先遍历，节点先挂到父节点上再填充子项，无需递归
+            pending = deque([(str(directory), root, 0)])
+            while pending:
+                path, node, depth = pending.popleft()
+                children = node["children"]
                 
                 try:
-                    for item in sorted(path.iterdir()):
-                        if item.is_dir():
-                            child = _scan_recursive(item, current_depth + 1)
-                            node["children"].append(child)
-                        elif item.suffix.lower() in self.file_processor.supported_formats:
-                            node["children"].append({
-                                "name": item.name,
-                                "path": str(item),
+                    with os.scandir(path) as it:
+                        entries = sorted(it, key=lambda entry: entry.name)
+                    
+                    for entry in entries:
+                        if entry.is_dir():
+                            if depth + 1 > max_depth:
+                                children.append({"truncated": True})
+                                continue
+                            child = {
+                                "name": entry.name,
+                                "path": entry.path,
+                                "type": "directory",
+                                "children": []
+                            }
+                            children.append(child)
+                            pending.append((entry.path, child, depth + 1))
+                        elif os.path.splitext(entry.name)[1].lower() in supported_formats:
+                            children.append({
+                                "name": entry.name,
+                                "path": entry.path,
                                 "type": "image_file",
-                                "size": item.stat().st_size
+                                "size": entry.stat().st_size
                             })
                 except PermissionError:
                     node["error"] = "无权限访问"
-                
-                return node
             
-            return _scan_recursive(directory)
+            return root
             
         except Exception as e:
             return {"error": str(e)}
@@ -494,6 +890,24 @@ class PromptParser:
         """初始化提示词解析器"""
         self.logger = logging.getLogger(__name__)
     
+    @staticmethod
+    def iter_prompt_file(file_path: Union[str, Path]) -> Iterator[str]:
+        """
+        逐行读取提示词文件，跳过空行和注释行
+        
+        Args:
+            file_path: 提示词文件路径
+            
+        Yields:
+            提示词
+        """
+        # 逐行读取，不将整个文件内容读入内存；较大的读缓冲减少系统调用次数
+        with open(file_path, 'r', encoding='utf-8', buffering=1 << 20) as f:
+            for line in f:
+                prompt = line.strip()
+                if prompt and not prompt.startswith(_PROMPT_COMMENT_PREFIXES):
+                    yield prompt
+    
     def parse_prompt_file(self, file_path: Union[str, Path]) -> List[str]:
         """
         解析提示词文件
@@ -506,19 +920,7 @@ class PromptParser:
         """
         try:
             file_path = Path(file_path)
-            
-            if not file_path.exists():
-                raise FileNotFoundError(f"文件不存在: {file_path}")
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 按行分割并清理
-            prompts = [
-                line.strip() 
-                for line in content.split('\n') 
-                if line.strip() and not line.strip().startswith('#')
-            ]
+            prompts = list(self.iter_prompt_file(file_path))
             
             self.logger.info(f"解析提示词文件成功: {file_path}, 找到 {len(prompts)} 个提示词")
             return prompts
@@ -545,15 +947,14 @@ class PromptParser:
             提示词数据列表
         """
         try:
-            import pandas as pd
-            
-            df = pd.read_csv(file_path, delimiter=delimiter)
-            
-            if prompt_column not in df.columns:
-                raise ValueError(f"CSV文件中未找到列: {prompt_column}")
-            
-            # 转换为字典列表
-            prompts = df.to_dict('records')
+            # 逐行读取为字典，无需构建DataFrame，也避免导入pandas
+            with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+                reader = csv.DictReader(f, delimiter=delimiter)
+                
+                if prompt_column not in (reader.fieldnames or ()):
+                    raise ValueError(f"CSV文件中未找到列: {prompt_column}")
+                
+                prompts = list(reader)
             
             self.logger.info(f"解析CSV提示词文件成功: {file_path}, 找到 {len(prompts)} 条记录")
             return prompts
@@ -563,7 +964,52 @@ class PromptParser:
             return []
 
 
-# 全局实例
-file_processor = FileProcessor()
-directory_scanner = DirectoryScanner()
-prompt_parser = PromptParser()
\ No newline at end of file
+# 全局实例（首次使用时创建，导入模块时不读取配置、不建立HTTP会话）
+_file_processor: Optional[FileProcessor] = None
+_directory_scanner: Optional[DirectoryScanner] = None
+_prompt_parser: Optional[PromptParser] = None
+_instance_lock = threading.Lock()
+
+
+def get_file_processor() -> FileProcessor:
+    """获取全局文件处理器实例"""
+    global _file_processor
+    if _file_processor is None:
+        with _instance_lock:
+            if _file_processor is None:
+                _file_processor = FileProcessor()
+    return _file_processor
+
+
+def get_directory_scanner() -> DirectoryScanner:
+    """获取全局目录扫描器实例"""
+    global _directory_scanner
+    if _directory_scanner is None:
+        with _instance_lock:
+            if _directory_scanner is None:
+                _directory_scanner = DirectoryScanner()
+    return _directory_scanner
+
+
+def get_prompt_parser() -> PromptParser:
+    """获取全局提示词解析器实例"""
+    global _prompt_parser
+    if _prompt_parser is None:
+        with _instance_lock:
+            if _prompt_parser is None:
+                _prompt_parser = PromptParser()
+    return _prompt_parser
+
+
+_LAZY_INSTANCES = {
+    "file_processor": get_file_processor,
+    "directory_scanner": get_directory_scanner,
+    "prompt_parser": get_prompt_parser,
+}
+
+
+def __getattr__(name: str) -> Any:
+    """兼容旧的 file_processor / directory_scanner / prompt_parser 模块属性访问"""
+    if name in _LAZY_INSTANCES:
+        return _LAZY_INSTANCES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
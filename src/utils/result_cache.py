@@ -0,0 +1,114 @@
+"""
+生成结果缓存模块
+按请求参数缓存API生成结果，相同请求直接返回已有结果而不再调用付费接口
+"""
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from .config import config_manager
+
+
+class ResultCache:
+    """基于文件系统的生成结果缓存"""
+    
+    def __init__(self, cache_dir: Optional[Path] = None, ttl: Optional[float] = None):
+        """
+        初始化结果缓存
+        
+        Args:
+            cache_dir: 缓存目录，默认为配置中的缓存目录下的 results 子目录
+            ttl: 缓存有效期（秒），默认读取配置；0表示不缓存
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        if cache_dir is None:
+            cache_dir = config_manager.get_absolute_path(
+                config_manager.get("paths.cache_dir", "cache")
+            ) / "results"
+        self.cache_dir = Path(cache_dir)
+        # 生成结果中的图像URL有时效，缓存有效期需短于URL有效期
+        self.ttl = config_manager.get("cache.result_ttl", 82800) if ttl is None else ttl
+    
+    @staticmethod
+    def make_key(**fields: Any) -> str:
+        """
+        根据请求参数计算缓存键
+        
+        Args:
+            **fields: 影响生成结果的全部请求参数
+        
+        Returns:
+            SHA-256十六进制摘要
+        """
+        payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _path_for(self, key: str) -> Path:
+        """缓存文件路径，按键前两位分目录避免单目录文件过多"""
+        return self.cache_dir / key[:2] / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存结果
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            缓存的结果，未命中或已过期时返回None
+        """
+        if not self.ttl:
+            return None
+        
+        path = self._path_for(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning("读取结果缓存失败: %s, 错误: %s", path, e)
+            return None
+    
+    def set(self, key: str, value: Dict[str, Any]) -> bool:
+        """
+        写入缓存结果
+        
+        Args:
+            key: 缓存键
+            value: 可JSON序列化的结果
+        
+        Returns:
+            是否写入成功
+        """
+        if not self.ttl:
+            return False
+        
+        path = self._path_for(key)
+        tmp_path = path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            # 原子替换，并发读取时不会看到写了一半的文件
+            os.replace(tmp_path, path)
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning("写入结果缓存失败: %s, 错误: %s", path, e)
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return False
+
+
+# 全局结果缓存实例
+result_cache = ResultCache()